@@ -3,52 +3,208 @@ Advanced Views API Endpoints
 Multi-table JOIN views with dynamic query building
 """
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 import structlog
-import json
+import orjson
+import base64
+import re
 
-from app.database import get_db
+from app.database import get_db, get_db_ro, ReadOnlySessionLocal
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = structlog.get_logger()
 
 
+# In-process caches (key -> (expires_at, value)) for rarely changing lookups
+_view_cache: Dict[int, Tuple[datetime, Dict[str, Any]]] = {}
+_relations_cache: Dict[str, Tuple[datetime, List[Dict[str, Any]]]] = {}
+_tables_cache: Dict[str, Tuple[datetime, List[Dict[str, Any]]]] = {}
+_columns_cache: Dict[str, Tuple[datetime, List[Dict[str, Any]]]] = {}
+_column_types_cache: Dict[str, Tuple[datetime, Dict[str, str]]] = {}
+VIEW_CACHE_TTL = timedelta(seconds=60)
+RELATIONS_CACHE_TTL = timedelta(minutes=5)
+METADATA_CACHE_TTL = timedelta(minutes=5)  # Only changes when DDL runs
+
+
+def _cache_get(cache: Dict, key: Any) -> Optional[Any]:
+    """Return a cached value if present and not expired"""
+    entry = cache.get(key)
+    if entry and datetime.now() < entry[0]:
+        return entry[1]
+    return None
+
+
+def _cache_set(cache: Dict, key: Any, value: Any, ttl: timedelta) -> None:
+    """Store a value in a cache with the given TTL"""
+    cache[key] = (datetime.now() + ttl, value)
+
+
+# =====================================================
+# SQL STATEMENTS (compiled once at import)
+# =====================================================
+
+_Q_GET_ALL_RELATIONS = text("""
+    SELECT
+        id, source_table, source_column,
+        target_table, target_column,
+        relation_type, display_name, is_active
+    FROM bitrix.table_relations
+    WHERE is_active = true
+    ORDER BY source_table, target_table
+""")
+
+_Q_GET_TABLE_RELATIONS = text("""
+    SELECT
+        id, source_table, source_column,
+        target_table, target_column,
+        relation_type, display_name,
+        CASE
+            WHEN source_table = :table_name THEN 'outgoing'
+            ELSE 'incoming'
+        END as direction
+    FROM bitrix.table_relations
+    WHERE (source_table = :table_name OR target_table = :table_name)
+        AND is_active = true
+    ORDER BY source_table, target_table
+""")
+
+_Q_GET_VIEWS_BY_TABLE = text("""
+    SELECT id, view_name, description, primary_table,
+           filters, sort_config, is_default, is_system, created_at,
+           jsonb_array_length(COALESCE(joins, '[]'::jsonb)) AS join_count,
+           jsonb_array_length(COALESCE(selected_columns, '[]'::jsonb)) AS column_count
+    FROM bitrix.advanced_views
+    WHERE primary_table = :primary_table
+    ORDER BY is_system DESC, is_default DESC, view_name
+""")
+
+_Q_GET_VIEWS_ALL = text("""
+    SELECT id, view_name, description, primary_table,
+           filters, sort_config, is_default, is_system, created_at,
+           jsonb_array_length(COALESCE(joins, '[]'::jsonb)) AS join_count,
+           jsonb_array_length(COALESCE(selected_columns, '[]'::jsonb)) AS column_count
+    FROM bitrix.advanced_views
+    ORDER BY primary_table, is_system DESC, is_default DESC, view_name
+""")
+
+_Q_GET_VIEW_BY_ID = text("""
+    SELECT id, view_name, description, primary_table,
+           joins, selected_columns, filters, sort_config,
+           group_by, aggregations, is_default, is_system,
+           created_by, created_at, updated_at
+    FROM bitrix.advanced_views
+    WHERE id = :view_id
+""")
+
+_Q_INSERT_VIEW = text("""
+    INSERT INTO bitrix.advanced_views (
+        view_name, description, primary_table,
+        joins, selected_columns, filters, sort_config,
+        group_by, aggregations, is_default, created_by, created_at, updated_at
+    ) VALUES (
+        :view_name, :description, :primary_table,
+        :joins, :selected_columns, :filters, :sort_config,
+        :group_by, :aggregations, :is_default, :created_by, NOW(), NOW()
+    ) RETURNING id
+""")
+
+_Q_CHECK_SYSTEM = text("""
+    SELECT is_system FROM bitrix.advanced_views WHERE id = :view_id
+""")
+
+_Q_UPDATE_VIEW = text("""
+    UPDATE bitrix.advanced_views SET
+        view_name = COALESCE(:view_name, view_name),
+        description = COALESCE(:description, description),
+        joins = COALESCE(:joins, joins),
+        selected_columns = COALESCE(:selected_columns, selected_columns),
+        filters = COALESCE(:filters, filters),
+        sort_config = COALESCE(:sort_config, sort_config),
+        group_by = COALESCE(:group_by, group_by),
+        aggregations = COALESCE(:aggregations, aggregations),
+        is_default = COALESCE(:is_default, is_default),
+        updated_at = NOW()
+    WHERE id = :view_id AND is_system IS NOT TRUE
+    RETURNING id
+""")
+
+_Q_DELETE_VIEW = text("""
+    DELETE FROM bitrix.advanced_views
+    WHERE id = :view_id AND is_system IS NOT TRUE
+    RETURNING id
+""")
+
+_Q_GET_VIEW_CONFIG = text("""
+    SELECT primary_table, joins, selected_columns, filters, sort_config
+    FROM bitrix.advanced_views
+    WHERE id = :view_id
+""")
+
+_Q_GET_TABLE_METADATA = text("""
+    SELECT column_name, display_name, data_type, is_visible, sort_order
+    FROM bitrix.table_metadata
+    WHERE table_name = :table_name AND is_visible = true
+    ORDER BY sort_order, column_name
+""")
+
+_Q_GET_SCHEMA_COLUMNS = text("""
+    SELECT column_name, data_type
+    FROM information_schema.columns
+    WHERE table_schema = 'bitrix' AND table_name = :table_name
+    ORDER BY ordinal_position
+""")
+
+_Q_GET_TABLES_LIST = text("""
+    SELECT table_name
+    FROM information_schema.tables
+    WHERE table_schema = 'bitrix'
+        AND table_type = 'BASE TABLE'
+        AND table_name NOT IN ('data_views', 'advanced_views', 'table_relations', 'table_metadata')
+    ORDER BY table_name
+""")
+
+
+def _json_default(value: Any) -> Any:
+    """
+    orjson fallback for types it does not encode natively
+    
+    Rows are streamed after the 200 status is sent, so this never raises:
+    anything unrecognized falls back to str() instead of truncating the body.
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
 # =====================================================
 # TABLE RELATIONS ENDPOINTS
 # =====================================================
 
 @router.get("/relations")
-async def get_all_relations(db: AsyncSession = Depends(get_db)):
+async def get_all_relations(db: AsyncSession = Depends(get_db_ro)):
     """Get all defined table relations"""
     try:
-        query = text("""
-            SELECT 
-                id, source_table, source_column,
-                target_table, target_column,
-                relation_type, display_name, is_active
-            FROM bitrix.table_relations
-            WHERE is_active = true
-            ORDER BY source_table, target_table
-        """)
-        
-        result = await db.execute(query)
-        relations = []
+        relations = _cache_get(_relations_cache, "*")
+        if relations is not None:
+            return {"relations": relations, "total": len(relations)}
         
-        for row in result.fetchall():
-            relations.append({
-                "id": row[0],
-                "source_table": row[1],
-                "source_column": row[2],
-                "target_table": row[3],
-                "target_column": row[4],
-                "relation_type": row[5],
-                "display_name": row[6],
-                "is_active": row[7]
-            })
+        result = await db.execute(_Q_GET_ALL_RELATIONS)
+        relations = [dict(row) for row in result.mappings().all()]
         
+        _cache_set(_relations_cache, "*", relations, RELATIONS_CACHE_TTL)
         return {"relations": relations, "total": len(relations)}
         
     except Exception as e:
@@ -59,40 +215,22 @@ async def get_all_relations(db: AsyncSession = Depends(get_db)):
 @router.get("/relations/{table_name}")
 async def get_table_relations(
     table_name: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """Get all relations for a specific table (both as source and target)"""
     try:
-        query = text("""
-            SELECT 
-                id, source_table, source_column,
-                target_table, target_column,
-                relation_type, display_name,
-                CASE 
-                    WHEN source_table = :table_name THEN 'outgoing'
-                    ELSE 'incoming'
-                END as direction
-            FROM bitrix.table_relations
-            WHERE (source_table = :table_name OR target_table = :table_name)
-                AND is_active = true
-            ORDER BY source_table, target_table
-        """)
-        
-        result = await db.execute(query, {"table_name": table_name})
-        relations = []
-        
-        for row in result.fetchall():
-            relations.append({
-                "id": row[0],
-                "source_table": row[1],
-                "source_column": row[2],
-                "target_table": row[3],
-                "target_column": row[4],
-                "relation_type": row[5],
-                "display_name": row[6],
-                "direction": row[7]
-            })
-        
+        relations = _cache_get(_relations_cache, table_name)
+        if relations is not None:
+            return {
+                "table_name": table_name,
+                "relations": relations,
+                "total": len(relations)
+            }
+        
+        result = await db.execute(_Q_GET_TABLE_RELATIONS, {"table_name": table_name})
+        relations = [dict(row) for row in result.mappings().all()]
+        
+        _cache_set(_relations_cache, table_name, relations, RELATIONS_CACHE_TTL)
         return {
             "table_name": table_name,
             "relations": relations,
@@ -111,47 +249,27 @@ async def get_table_relations(
 @router.get("/")
 async def get_advanced_views(
     primary_table: Optional[str] = None,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
-    """Get all advanced views, optionally filtered by primary table"""
+    """
+    Get all advanced views, optionally filtered by primary table
+    
+    Only join/column counts are returned; use GET /{view_id} for full definitions.
+    """
     try:
         if primary_table:
-            query = text("""
-                SELECT id, view_name, description, primary_table, 
-                       joins, selected_columns, filters, sort_config,
-                       is_default, is_system, created_at
-                FROM bitrix.advanced_views
-                WHERE primary_table = :primary_table
-                ORDER BY is_system DESC, is_default DESC, view_name
-            """)
-            result = await db.execute(query, {"primary_table": primary_table})
+            result = await db.execute(_Q_GET_VIEWS_BY_TABLE, {"primary_table": primary_table})
         else:
-            query = text("""
-                SELECT id, view_name, description, primary_table, 
-                       joins, selected_columns, filters, sort_config,
-                       is_default, is_system, created_at
-                FROM bitrix.advanced_views
-                ORDER BY primary_table, is_system DESC, is_default DESC, view_name
-            """)
-            result = await db.execute(query)
-        
-        views = []
-        for row in result.fetchall():
-            views.append({
-                "id": row[0],
-                "view_name": row[1],
-                "description": row[2],
-                "primary_table": row[3],
-                "joins": row[4] or [],
-                "selected_columns": row[5] or [],
-                "filters": row[6] or {},
-                "sort_config": row[7] or {},
-                "is_default": row[8],
-                "is_system": row[9],
-                "created_at": row[10].isoformat() if row[10] else None,
-                "join_count": len(row[4]) if row[4] else 0,
-                "column_count": len(row[5]) if row[5] else 0
-            })
+            result = await db.execute(_Q_GET_VIEWS_ALL)
+        
+        views = [
+            {
+                **row,
+                "filters": row["filters"] or {},
+                "sort_config": row["sort_config"] or {}
+            }
+            for row in result.mappings().all()
+        ]
         
         return {"views": views, "total": len(views)}
         
@@ -163,20 +281,11 @@ async def get_advanced_views(
 @router.get("/{view_id}")
 async def get_advanced_view(
     view_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """Get a specific advanced view with full details"""
     try:
-        query = text("""
-            SELECT id, view_name, description, primary_table, 
-                   joins, selected_columns, filters, sort_config,
-                   group_by, aggregations, is_default, is_system,
-                   created_by, created_at, updated_at
-            FROM bitrix.advanced_views
-            WHERE id = :view_id
-        """)
-        
-        result = await db.execute(query, {"view_id": view_id})
+        result = await db.execute(_Q_GET_VIEW_BY_ID, {"view_id": view_id})
         row = result.first()
         
         if not row:
@@ -196,8 +305,8 @@ async def get_advanced_view(
             "is_default": row[10],
             "is_system": row[11],
             "created_by": row[12],
-            "created_at": row[13].isoformat() if row[13] else None,
-            "updated_at": row[14].isoformat() if row[14] else None
+            "created_at": row[13],
+            "updated_at": row[14]
         }
         
     except HTTPException:
@@ -220,36 +329,22 @@ async def create_advanced_view(
         if not view_data.get("primary_table"):
             raise HTTPException(status_code=400, detail="primary_table is required")
         
-        insert_query = text("""
-            INSERT INTO bitrix.advanced_views (
-                view_name, description, primary_table,
-                joins, selected_columns, filters, sort_config,
-                group_by, aggregations, is_default, created_by, created_at, updated_at
-            ) VALUES (
-                :view_name, :description, :primary_table,
-                :joins, :selected_columns, :filters, :sort_config,
-                :group_by, :aggregations, :is_default, :created_by, :created_at, :updated_at
-            ) RETURNING id
-        """)
-        
-        result = await db.execute(insert_query, {
+        result = await db.execute(_Q_INSERT_VIEW, {
             "view_name": view_data.get("view_name"),
             "description": view_data.get("description"),
             "primary_table": view_data.get("primary_table"),
-            "joins": json.dumps(view_data.get("joins", [])),
-            "selected_columns": json.dumps(view_data.get("selected_columns", [])),
-            "filters": json.dumps(view_data.get("filters", {})),
-            "sort_config": json.dumps(view_data.get("sort_config", {})),
-            "group_by": json.dumps(view_data.get("group_by", [])),
-            "aggregations": json.dumps(view_data.get("aggregations", [])),
+            "joins": view_data.get("joins", []),
+            "selected_columns": view_data.get("selected_columns", []),
+            "filters": view_data.get("filters", {}),
+            "sort_config": view_data.get("sort_config", {}),
+            "group_by": view_data.get("group_by", []),
+            "aggregations": view_data.get("aggregations", []),
             "is_default": view_data.get("is_default", False),
-            "created_by": view_data.get("created_by"),
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
+            "created_by": view_data.get("created_by")
         })
         
+        view_id = result.scalar_one()
         await db.commit()
-        view_id = result.scalar()
         
         logger.info("advanced_view_created", view_id=view_id, name=view_data.get("view_name"))
         
@@ -275,48 +370,29 @@ async def update_advanced_view(
 ):
     """Update an advanced view"""
     try:
-        # Check if view exists and is not system
-        check_query = text("""
-            SELECT is_system FROM bitrix.advanced_views WHERE id = :view_id
-        """)
-        result = await db.execute(check_query, {"view_id": view_id})
-        row = result.first()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail="View not found")
-        if row[0]:
-            raise HTTPException(status_code=400, detail="System views cannot be modified")
-        
-        update_query = text("""
-            UPDATE bitrix.advanced_views SET
-                view_name = COALESCE(:view_name, view_name),
-                description = COALESCE(:description, description),
-                joins = COALESCE(:joins, joins),
-                selected_columns = COALESCE(:selected_columns, selected_columns),
-                filters = COALESCE(:filters, filters),
-                sort_config = COALESCE(:sort_config, sort_config),
-                group_by = COALESCE(:group_by, group_by),
-                aggregations = COALESCE(:aggregations, aggregations),
-                is_default = COALESCE(:is_default, is_default),
-                updated_at = :updated_at
-            WHERE id = :view_id
-        """)
-        
-        await db.execute(update_query, {
+        # System views are excluded by the UPDATE itself
+        result = await db.execute(_Q_UPDATE_VIEW, {
             "view_id": view_id,
             "view_name": view_data.get("view_name"),
             "description": view_data.get("description"),
-            "joins": json.dumps(view_data.get("joins")) if view_data.get("joins") else None,
-            "selected_columns": json.dumps(view_data.get("selected_columns")) if view_data.get("selected_columns") else None,
-            "filters": json.dumps(view_data.get("filters")) if view_data.get("filters") else None,
-            "sort_config": json.dumps(view_data.get("sort_config")) if view_data.get("sort_config") else None,
-            "group_by": json.dumps(view_data.get("group_by")) if view_data.get("group_by") else None,
-            "aggregations": json.dumps(view_data.get("aggregations")) if view_data.get("aggregations") else None,
-            "is_default": view_data.get("is_default"),
-            "updated_at": datetime.now()
+            "joins": view_data.get("joins") or None,
+            "selected_columns": view_data.get("selected_columns") or None,
+            "filters": view_data.get("filters") or None,
+            "sort_config": view_data.get("sort_config") or None,
+            "group_by": view_data.get("group_by") or None,
+            "aggregations": view_data.get("aggregations") or None,
+            "is_default": view_data.get("is_default")
         })
         
+        if result.scalar_one_or_none() is None:
+            # Nothing updated: find out whether the view is missing or a system view
+            is_system = await db.scalar(_Q_CHECK_SYSTEM, {"view_id": view_id})
+            if is_system is None:
+                raise HTTPException(status_code=404, detail="View not found")
+            raise HTTPException(status_code=400, detail="System views cannot be modified")
+        
         await db.commit()
+        _view_cache.pop(view_id, None)
         
         logger.info("advanced_view_updated", view_id=view_id)
         
@@ -337,21 +413,18 @@ async def delete_advanced_view(
 ):
     """Delete an advanced view"""
     try:
-        # Check if view exists and is not system
-        check_query = text("""
-            SELECT is_system FROM bitrix.advanced_views WHERE id = :view_id
-        """)
-        result = await db.execute(check_query, {"view_id": view_id})
-        row = result.first()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail="View not found")
-        if row[0]:
+        # System views are excluded by the DELETE itself
+        result = await db.execute(_Q_DELETE_VIEW, {"view_id": view_id})
+        
+        if result.scalar_one_or_none() is None:
+            # Nothing deleted: find out whether the view is missing or a system view
+            is_system = await db.scalar(_Q_CHECK_SYSTEM, {"view_id": view_id})
+            if is_system is None:
+                raise HTTPException(status_code=404, detail="View not found")
             raise HTTPException(status_code=400, detail="System views cannot be deleted")
         
-        delete_query = text("DELETE FROM bitrix.advanced_views WHERE id = :view_id")
-        await db.execute(delete_query, {"view_id": view_id})
         await db.commit()
+        _view_cache.pop(view_id, None)
         
         logger.info("advanced_view_deleted", view_id=view_id)
         
@@ -369,94 +442,234 @@ async def delete_advanced_view(
 # QUERY EXECUTION ENDPOINT
 # =====================================================
 
+async def _load_view(db: AsyncSession, view_id: int) -> Optional[Dict[str, Any]]:
+    """Get a view's query configuration, served from cache when fresh"""
+    view = _cache_get(_view_cache, view_id)
+    if view is not None:
+        return view
+    
+    result = await db.execute(_Q_GET_VIEW_CONFIG, {"view_id": view_id})
+    row = result.first()
+    
+    if not row:
+        return None
+    
+    view = {
+        "primary_table": row[0],
+        "joins": row[1] or [],
+        "selected_columns": row[2] or [],
+        "filters": row[3] or {},
+        "sort_config": row[4] or {}
+    }
+    _cache_set(_view_cache, view_id, view, VIEW_CACHE_TTL)
+    return view
+
+
+async def _get_column_types(db: AsyncSession, table_name: str) -> Dict[str, str]:
+    """Get column name -> information_schema data_type for a table, served from cache when fresh"""
+    column_types = _cache_get(_column_types_cache, table_name)
+    if column_types is not None:
+        return column_types
+    
+    result = await db.execute(_Q_GET_SCHEMA_COLUMNS, {"table_name": table_name})
+    column_types = {row["column_name"]: row["data_type"] for row in result.mappings().all()}
+    
+    _cache_set(_column_types_cache, table_name, column_types, METADATA_CACHE_TTL)
+    return column_types
+
+
 @router.get("/{view_id}/data")
 async def execute_advanced_view(
     view_id: int,
     limit: int = 100,
     offset: int = 0,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
-    """Execute an advanced view and return data"""
+    """Execute an advanced view and stream data as JSON"""
     try:
-        # Get view configuration
-        view_query = text("""
-            SELECT primary_table, joins, selected_columns, filters, sort_config
-            FROM bitrix.advanced_views
-            WHERE id = :view_id
-        """)
-        
-        result = await db.execute(view_query, {"view_id": view_id})
-        view = result.first()
+        view = await _load_view(db, view_id)
         
         if not view:
             raise HTTPException(status_code=404, detail="View not found")
         
-        primary_table = view[0]
-        joins = view[1] or []
-        selected_columns = view[2] or []
-        filters = view[3] or {}
-        sort_config = view[4] or {}
+        primary_table = view["primary_table"]
+        joins = view["joins"]
+        selected_columns = view["selected_columns"]
+        filters = view["filters"]
+        sort_config = view["sort_config"]
+        
+        # Column types of every referenced table, so filter values bind as the column's type
+        column_types = {primary_table: await _get_column_types(db, primary_table)}
+        for join in joins:
+            alias = join.get("alias", join.get("table"))
+            if alias not in column_types:
+                column_types[alias] = await _get_column_types(db, join.get("table"))
         
         # Build dynamic SQL query
-        sql = build_advanced_view_query(
+        sql, binds = build_advanced_view_query(
             primary_table=primary_table,
             joins=joins,
             selected_columns=selected_columns,
             filters=filters,
             sort_config=sort_config,
             limit=limit,
-            offset=offset
+            offset=offset,
+            column_types=column_types
         )
         
         logger.info("executing_advanced_view", view_id=view_id, sql=sql[:200])
         
-        # Execute query
-        data_result = await db.execute(text(sql))
-        rows = data_result.fetchall()
-        
-        # Get column names from selected_columns
-        column_names = []
-        for col in selected_columns:
-            alias = col.get("alias") or col.get("column")
-            column_names.append(alias)
-        
-        # Convert to list of dicts
-        data = []
-        for row in rows:
-            row_dict = {}
-            for i, col_name in enumerate(column_names):
-                if i < len(row):
-                    value = row[i]
-                    # Handle datetime serialization
-                    if hasattr(value, 'isoformat'):
-                        value = value.isoformat()
-                    row_dict[col_name] = value
-            data.append(row_dict)
-        
-        # Get total count
-        count_sql = build_advanced_view_count_query(primary_table, joins, filters)
-        count_result = await db.execute(text(count_sql))
-        total = count_result.scalar() or 0
+        # Column names are fixed for the whole result, so build them once
+        column_names = tuple(col.get("alias") or col.get("column") for col in selected_columns)
         
-        return {
-            "data": data,
-            "total": total,
-            "limit": limit,
-            "offset": offset,
-            "columns": column_names
-        }
+        # Open the server-side cursor here so query errors still map to a 500
+        session = ReadOnlySessionLocal()
+        try:
+            data_result = await session.stream(text(sql), binds)
+        except Exception:
+            await session.close()
+            raise
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("execute_advanced_view_error", view_id=view_id, error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+    
+    async def stream_rows():
+        """Write rows as they arrive from the cursor instead of buffering the page"""
+        try:
+            yield b'{"data":['
+            first = True
+            total = 0
+            async for row in data_result:
+                # __total (COUNT(*) OVER ()) is the trailing column; zip drops it
+                total = row[-1]
+                chunk = orjson.dumps(dict(zip(column_names, row)), default=_json_default)
+                yield chunk if first else b"," + chunk
+                first = False
+            meta = orjson.dumps({
+                "total": total,
+                "limit": limit,
+                "offset": offset,
+                "columns": column_names
+            })
+            yield b"]," + meta[1:]
+        except Exception as e:
+            logger.error("execute_advanced_view_stream_error", view_id=view_id, error=str(e))
+            raise
+        finally:
+            await data_result.close()
+            await session.close()
+    
+    return StreamingResponse(stream_rows(), media_type="application/json")
 
 
 # =====================================================
 # QUERY BUILDER FUNCTIONS
 # =====================================================
 
+# Filter fields are identifiers, optionally qualified by a (quoted) table alias
+_FILTER_FIELD_RE = re.compile(r'^(?:"?([A-Za-z_][A-Za-z0-9_]*)"?\.)?"?([A-Za-z_][A-Za-z0-9_]*)"?$')
+
+ALLOWED_SORT_ORDERS = frozenset({"ASC", "DESC"})
+
+_INTEGER_TYPES = frozenset({"smallint", "integer", "bigint"})
+_FLOAT_TYPES = frozenset({"real", "double precision"})
+_TEXT_TYPES = frozenset({"text", "character varying", "character"})
+_PATTERN_OPERATORS = frozenset({"LIKE", "ILIKE", "NOT LIKE", "NOT ILIKE"})
+
+ALLOWED_FILTER_OPERATORS = frozenset({
+    "=", "!=", "<>", "<", "<=", ">", ">=",
+    "LIKE", "ILIKE", "NOT LIKE", "NOT ILIKE"
+})
+
+
+def _normalize_filter(field: str, config: Any) -> Tuple[str, str, Any]:
+    """Turn a filter entry into (field, operator, value); plain values mean equality"""
+    if isinstance(config, dict):
+        return field, str(config.get("operator", "=")).upper(), config.get("value")
+    return field, "=", config
+
+
+def _coerce_filter_value(value: Any, data_type: Optional[str], operator: str) -> Any:
+    """
+    Convert a JSON filter value to the Python type asyncpg expects for the column
+    
+    Bound parameters take the column's type, and asyncpg rejects e.g. a str
+    for a date column; unknown columns and types pass the value through.
+    """
+    if operator in _PATTERN_OPERATORS or data_type in _TEXT_TYPES:
+        return value if isinstance(value, str) else str(value)
+    if data_type is None or isinstance(value, bool):
+        return value
+    
+    if data_type in _INTEGER_TYPES:
+        return int(value)
+    if data_type == "numeric":
+        return Decimal(str(value))
+    if data_type in _FLOAT_TYPES:
+        return float(value)
+    if data_type == "boolean" and isinstance(value, str):
+        return value.strip().lower() in ("true", "t", "1", "yes")
+    if not isinstance(value, str):
+        return value
+    if data_type == "date":
+        return date.fromisoformat(value[:10])
+    if data_type == "timestamp with time zone":
+        return datetime.fromisoformat(value)
+    if data_type == "timestamp without time zone":
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    return value
+
+
+def build_where_clause(
+    filters: Dict,
+    column_types: Optional[Dict[str, Dict[str, str]]] = None,
+    default_table: Optional[str] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build a WHERE clause with bound parameters from view filters
+    
+    Values are never inlined into the SQL text, so identical filter shapes
+    share one statement (and one cached plan) regardless of their values.
+    column_types maps table name/alias -> column -> data_type; unqualified
+    fields belong to default_table.
+    
+    Raises:
+        ValueError: If a filter field, operator or value is not allowed
+    """
+    terms = [
+        term for term in (_normalize_filter(f, c) for f, c in filters.items())
+        if term[2] is not None
+    ]
+    if not terms:
+        return "1=1", {}
+    
+    column_types = column_types or {}
+    binds = {}
+    for i, (field, operator, value) in enumerate(terms):
+        match = _FILTER_FIELD_RE.match(field)
+        if not match:
+            raise ValueError(f"Invalid filter field: {field}")
+        if operator not in ALLOWED_FILTER_OPERATORS:
+            raise ValueError(f"Invalid filter operator: {operator}")
+        
+        table, column = match.group(1) or default_table, match.group(2)
+        data_type = column_types.get(table, {}).get(column)
+        try:
+            binds[f"f{i}"] = _coerce_filter_value(value, data_type, operator)
+        except (ValueError, ArithmeticError):
+            raise ValueError(f"Invalid value for filter {field}: {value!r}")
+    
+    where_clause = " AND ".join(
+        f"{field} {operator} :f{i}" for i, (field, operator, _) in enumerate(terms)
+    )
+    return where_clause, binds
+
+
 def build_advanced_view_query(
     primary_table: str,
     joins: List[Dict],
@@ -464,9 +677,19 @@ def build_advanced_view_query(
     filters: Dict,
     sort_config: Dict,
     limit: int = 100,
-    offset: int = 0
-) -> str:
-    """Build SQL query from view configuration"""
+    offset: int = 0,
+    column_types: Optional[Dict[str, Dict[str, str]]] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build SQL query and bind parameters from view configuration
+    
+    Raises:
+        ValueError: If a filter or the sort configuration is not allowed
+    """
+    
+    # Join alias per table (first join wins), so column lookup is O(1)
+    alias_by_table = {j.get("table"): j.get("alias", j.get("table")) for j in reversed(joins)}
+    primary_ref = f'"{primary_table}"'
     
     # Build SELECT clause
     select_parts = []
@@ -479,26 +702,24 @@ def build_advanced_view_query(
         if col.get("table_alias"):
             select_parts.append(f'"{col["table_alias"]}".{column} AS "{alias}"')
         elif table == primary_table:
-            select_parts.append(f'"{primary_table}".{column} AS "{alias}"')
+            select_parts.append(f'{primary_ref}.{column} AS "{alias}"')
         else:
-            # Find the join alias for this table
-            join_alias = None
-            for j in joins:
-                if j.get("table") == table:
-                    join_alias = j.get("alias", table)
-                    break
+            join_alias = alias_by_table.get(table)
             if join_alias:
                 select_parts.append(f'"{join_alias}".{column} AS "{alias}"')
             else:
                 select_parts.append(f'"{table}".{column} AS "{alias}"')
     
     if not select_parts:
-        select_parts = [f'"{primary_table}".*']
+        select_parts = [f'{primary_ref}.*']
+    
+    # Total row count rides along with the page instead of a second query
+    select_parts.append("COUNT(*) OVER () AS __total")
     
     select_clause = ", ".join(select_parts)
     
     # Build FROM clause
-    from_clause = f'bitrix.{primary_table} AS "{primary_table}"'
+    from_clause = f'bitrix.{primary_table} AS {primary_ref}'
     
     # Build JOIN clauses
     join_clauses = []
@@ -512,10 +733,10 @@ def build_advanced_view_query(
         # Determine join direction
         if join.get("reverse"):
             # Reverse join (target.column = primary.column)
-            join_condition = f'"{alias}".{on_target} = "{primary_table}".{on_source}'
+            join_condition = f'"{alias}".{on_target} = {primary_ref}.{on_source}'
         else:
             # Normal join (primary.column = target.column)
-            join_condition = f'"{primary_table}".{on_source} = "{alias}".{on_target}'
+            join_condition = f'{primary_ref}.{on_source} = "{alias}".{on_target}'
         
         join_clauses.append(
             f'{join_type} JOIN bitrix.{target_table} AS "{alias}" ON {join_condition}'
@@ -523,101 +744,34 @@ def build_advanced_view_query(
     
     join_clause = " ".join(join_clauses)
     
-    # Build WHERE clause
-    where_parts = []
-    for field, config in filters.items():
-        if isinstance(config, dict):
-            operator = config.get("operator", "=")
-            value = config.get("value")
-            if value is not None:
-                # Escape single quotes
-                if isinstance(value, str):
-                    value = value.replace("'", "''")
-                    where_parts.append(f"{field} {operator} '{value}'")
-                else:
-                    where_parts.append(f"{field} {operator} {value}")
-        else:
-            if isinstance(config, str):
-                config = config.replace("'", "''")
-                where_parts.append(f"{field} = '{config}'")
-            else:
-                where_parts.append(f"{field} = {config}")
-    
-    where_clause = " AND ".join(where_parts) if where_parts else "1=1"
+    # Build WHERE clause with bound filter values
+    where_clause, binds = build_where_clause(filters, column_types, primary_table)
+    binds["limit"] = limit
+    binds["offset"] = offset
     
     # Build ORDER BY clause
     order_clause = ""
     if sort_config:
         column = sort_config.get("column")
-        order = sort_config.get("order", "ASC").upper()
+        order = str(sort_config.get("order") or "ASC").upper()
         if column:
+            if not _FILTER_FIELD_RE.match(column):
+                raise ValueError(f"Invalid sort column: {column}")
+            if order not in ALLOWED_SORT_ORDERS:
+                raise ValueError(f"Invalid sort order: {order}")
             order_clause = f'ORDER BY {column} {order}'
     
-    # Build final query
-    sql = f"""
-        SELECT {select_clause}
-        FROM {from_clause}
-        {join_clause}
-        WHERE {where_clause}
-        {order_clause}
-        LIMIT {limit} OFFSET {offset}
-    """
-    
-    return sql.strip()
-
-
-def build_advanced_view_count_query(
-    primary_table: str,
-    joins: List[Dict],
-    filters: Dict
-) -> str:
-    """Build count query for pagination"""
-    
-    from_clause = f'bitrix.{primary_table} AS "{primary_table}"'
+    # Build final query, skipping empty JOIN / ORDER BY clauses
+    sql = "\n".join(filter(None, [
+        f"SELECT {select_clause}",
+        f"FROM {from_clause}",
+        join_clause,
+        f"WHERE {where_clause}",
+        order_clause,
+        "LIMIT :limit OFFSET :offset"
+    ]))
     
-    # Build JOIN clauses (same as above but simplified)
-    join_clauses = []
-    for join in joins:
-        join_type = join.get("join_type", "LEFT").upper()
-        target_table = join.get("table")
-        alias = join.get("alias", target_table)
-        on_source = join.get("on_source")
-        on_target = join.get("on_target")
-        
-        if join.get("reverse"):
-            join_condition = f'"{alias}".{on_target} = "{primary_table}".{on_source}'
-        else:
-            join_condition = f'"{primary_table}".{on_source} = "{alias}".{on_target}'
-        
-        join_clauses.append(
-            f'{join_type} JOIN bitrix.{target_table} AS "{alias}" ON {join_condition}'
-        )
-    
-    join_clause = " ".join(join_clauses)
-    
-    # Build WHERE clause
-    where_parts = []
-    for field, config in filters.items():
-        if isinstance(config, dict):
-            operator = config.get("operator", "=")
-            value = config.get("value")
-            if value is not None:
-                if isinstance(value, str):
-                    value = value.replace("'", "''")
-                    where_parts.append(f"{field} {operator} '{value}'")
-                else:
-                    where_parts.append(f"{field} {operator} {value}")
-    
-    where_clause = " AND ".join(where_parts) if where_parts else "1=1"
-    
-    sql = f"""
-        SELECT COUNT(DISTINCT "{primary_table}".bitrix_id)
-        FROM {from_clause}
-        {join_clause}
-        WHERE {where_clause}
-    """
-    
-    return sql.strip()
+    return sql, binds
 
 
 # =====================================================
@@ -627,53 +781,38 @@ def build_advanced_view_count_query(
 @router.get("/tables/columns/{table_name}")
 async def get_table_columns(
     table_name: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """Get all columns for a table"""
     try:
-        # First check metadata table
-        meta_query = text("""
-            SELECT column_name, display_name, data_type, is_visible, sort_order
-            FROM bitrix.table_metadata
-            WHERE table_name = :table_name AND is_visible = true
-            ORDER BY sort_order, column_name
-        """)
+        columns = _cache_get(_columns_cache, table_name)
+        if columns is not None:
+            return {"table_name": table_name, "columns": columns}
         
-        result = await db.execute(meta_query, {"table_name": table_name})
-        rows = result.fetchall()
+        # First check metadata table
+        result = await db.execute(_Q_GET_TABLE_METADATA, {"table_name": table_name})
+        rows = result.mappings().all()
         
         if rows:
             columns = [
-                {
-                    "column_name": row[0],
-                    "display_name": row[1] or row[0],
-                    "data_type": row[2],
-                    "is_visible": row[3],
-                    "sort_order": row[4]
-                }
+                {**row, "display_name": row["display_name"] or row["column_name"]}
                 for row in rows
             ]
         else:
             # Fallback to information_schema
-            schema_query = text("""
-                SELECT column_name, data_type
-                FROM information_schema.columns
-                WHERE table_schema = 'bitrix' AND table_name = :table_name
-                ORDER BY ordinal_position
-            """)
-            
-            result = await db.execute(schema_query, {"table_name": table_name})
+            result = await db.execute(_Q_GET_SCHEMA_COLUMNS, {"table_name": table_name})
             columns = [
                 {
-                    "column_name": row[0],
-                    "display_name": row[0],
-                    "data_type": row[1],
+                    "column_name": row["column_name"],
+                    "display_name": row["column_name"],
+                    "data_type": row["data_type"],
                     "is_visible": True,
                     "sort_order": 0
                 }
-                for row in result.fetchall()
+                for row in result.mappings().all()
             ]
         
+        _cache_set(_columns_cache, table_name, columns, METADATA_CACHE_TTL)
         return {"table_name": table_name, "columns": columns}
         
     except Exception as e:
@@ -682,19 +821,14 @@ async def get_table_columns(
 
 
 @router.get("/tables/list")
-async def get_available_tables(db: AsyncSession = Depends(get_db)):
+async def get_available_tables(db: AsyncSession = Depends(get_db_ro)):
     """Get list of available Bitrix tables"""
     try:
-        query = text("""
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = 'bitrix'
-                AND table_type = 'BASE TABLE'
-                AND table_name NOT IN ('data_views', 'advanced_views', 'table_relations', 'table_metadata')
-            ORDER BY table_name
-        """)
+        tables = _cache_get(_tables_cache, "*")
+        if tables is not None:
+            return {"tables": tables}
         
-        result = await db.execute(query)
+        result = await db.execute(_Q_GET_TABLES_LIST)
         
         # Table display names mapping
         display_names = {
@@ -718,8 +852,20 @@ async def get_available_tables(db: AsyncSession = Depends(get_db)):
                 "display_name": display_names.get(table_name, table_name.replace("_", " ").title())
             })
         
+        _cache_set(_tables_cache, "*", tables, METADATA_CACHE_TTL)
         return {"tables": tables}
         
     except Exception as e:
         logger.error("get_available_tables_error", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/cache/invalidate")
+async def invalidate_cache():
+    """Flush cached table, column, relation and view lookups (e.g. after DDL)"""
+    for cache in (_tables_cache, _columns_cache, _column_types_cache, _relations_cache, _view_cache):
+        cache.clear()
+    
+    logger.info("advanced_views_cache_invalidated")
+    
+    return {"message": "Cache invalidated successfully"}
@@ -7,29 +7,72 @@ Handles:
 - Manage AI provider settings
 """
 
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from typing import Any, Dict, Mapping, Optional, List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert, update, desc, text
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal
 from pydantic import BaseModel, Field
 from enum import Enum
 
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal, ReadOnlySessionLocal
 from app.services.ai_summarizer import (
     CustomerDataCollector,
     AISummarizer,
     BitrixSummaryWriter,
-    AIProvider
+    AIProvider,
+    invalidate_collected_data
 )
 from app.config import settings
 
+import asyncio
+import hashlib
 import structlog
+import orjson
 import os
+import sys
+from functools import lru_cache
+from types import MappingProxyType
 
 logger = structlog.get_logger()
 
-router = APIRouter(prefix="/api/v1/ai-summary", tags=["ai-summary"])
+router = APIRouter(prefix="/api/v1/ai-summary", tags=["ai-summary"], default_response_class=ORJSONResponse)
+
+
+# In-process caches (key -> (expires_at, (serialized JSON, ETag))) for filter lookups
+# Deals are written by the sync worker, not this process, so staleness is
+# bounded by the TTL; POST /lookups/refresh clears them on demand
+_stages_cache: Dict[Tuple, Tuple[datetime, Tuple[bytes, str]]] = {}
+_categories_cache: Dict[Tuple, Tuple[datetime, Tuple[bytes, str]]] = {}
+LOOKUP_CACHE_TTL = timedelta(seconds=30)
+
+
+def _cache_get(cache: Dict, key: Any) -> Optional[Any]:
+    """Return a cached value if present and not expired"""
+    entry = cache.get(key)
+    if entry and datetime.now() < entry[0]:
+        return entry[1]
+    return None
+
+
+def _cache_set(cache: Dict, key: Any, value: Any, ttl: timedelta) -> None:
+    """Store a value in a cache with the given TTL"""
+    cache[key] = (datetime.now() + ttl, value)
+
+
+def _etag(body: bytes) -> str:
+    """Strong ETag for a serialized payload"""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def _conditional_response(request: Request, body: bytes, etag: str) -> Response:
+    """Serve a pre-serialized payload, or 304 if the client already has it"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 # ============================================================================
@@ -44,6 +87,16 @@ class AIProviderEnum(str, Enum):
     ollama = "ollama"
 
 
+# Request enum -> summarizer enum (read-only)
+PROVIDER_MAP: Mapping[AIProviderEnum, AIProvider] = MappingProxyType({
+    AIProviderEnum.openai: AIProvider.OPENAI,
+    AIProviderEnum.claude: AIProvider.CLAUDE,
+    AIProviderEnum.gemini: AIProvider.GEMINI,
+    AIProviderEnum.openrouter: AIProvider.OPENROUTER,
+    AIProviderEnum.ollama: AIProvider.OLLAMA,
+})
+
+
 class GenerateSummaryRequest(BaseModel):
     """Request to generate AI summary"""
     deal_id: int = Field(..., description="Bitrix24 Deal ID")
@@ -53,6 +106,13 @@ class GenerateSummaryRequest(BaseModel):
     write_mode: str = Field(default="timeline", description="Where to write: 'timeline' or 'comments'")
 
 
+class GenerateBatchRequest(BaseModel):
+    """Request to generate AI summaries for several deals"""
+    deal_ids: List[int] = Field(..., min_length=1, max_length=50, description="Bitrix24 Deal IDs")
+    provider: AIProviderEnum = Field(default=AIProviderEnum.openai, description="AI provider to use")
+    model: Optional[str] = Field(default=None, description="Specific model to use")
+
+
 class SummaryResponse(BaseModel):
     """AI Summary response"""
     id: Optional[int] = None
@@ -63,6 +123,7 @@ class SummaryResponse(BaseModel):
     model: str
     created_at: datetime
     written_to_bitrix: bool = False
+    bitrix_write_pending: bool = False
     bitrix_write_result: Optional[dict] = None
 
 
@@ -94,6 +155,25 @@ class SummaryHistoryItem(BaseModel):
     written_to_bitrix: bool
 
 
+class DealListPage(BaseModel):
+    """Paginated deal list (OpenAPI documentation only)"""
+    items: List[DealListItem]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
+    next_cursor: Optional[Dict[str, Any]] = None
+
+
+class SummaryHistoryPage(BaseModel):
+    """Paginated summary history (OpenAPI documentation only)"""
+    items: List[SummaryHistoryItem]
+    total: int
+    page: int
+    page_size: int
+    total_pages: int
+
+
 class WriteToBitrixRequest(BaseModel):
     """Request to write existing summary to Bitrix24"""
     summary_id: int
@@ -112,10 +192,13 @@ class AIProviderConfig(BaseModel):
 # API ENDPOINTS
 # ============================================================================
 
-@router.get("/providers")
-async def get_ai_providers() -> List[AIProviderConfig]:
+@lru_cache(maxsize=1)
+def _ai_providers_payload() -> Tuple[bytes, str]:
     """
-    Get available AI providers and their configuration status
+    Build the provider list once and keep it as serialized JSON plus its ETag
+    
+    API keys and model lists only change on restart; call
+    _ai_providers_payload.cache_clear() (POST /providers/refresh) to rebuild.
     """
     providers = []
     
@@ -176,11 +259,39 @@ async def get_ai_providers() -> List[AIProviderConfig]:
         default_model="llama3.2"
     ))
     
-    return providers
+    body = orjson.dumps([p.model_dump(mode="json") for p in providers])
+    return body, _etag(body)
+
+
+@router.get("/providers", response_model=List[AIProviderConfig])
+async def get_ai_providers(request: Request) -> Response:
+    """
+    Get available AI providers and their configuration status
+    """
+    return _conditional_response(request, *_ai_providers_payload())
+
+
+@router.post("/providers/refresh")
+async def refresh_ai_providers() -> dict:
+    """
+    Rebuild the cached provider list (e.g. after API keys change)
+    """
+    _ai_providers_payload.cache_clear()
+    return {"success": True}
+
+
+@router.post("/lookups/refresh")
+async def refresh_lookups() -> dict:
+    """
+    Drop cached /categories and /stages counts (e.g. after a full deal sync)
+    """
+    _categories_cache.clear()
+    _stages_cache.clear()
+    return {"success": True}
 
 
-# Stage ID to Name mapping for Bitrix24
-STAGE_NAME_MAP = {
+# Stage ID to Name mapping for Bitrix24 (read-only)
+STAGE_NAME_MAP: Mapping[str, str] = {
     # Genel aşamalar
     'NEW': 'Yeni',
     'PREPARATION': 'Hazırlık',
@@ -289,7 +400,9 @@ STAGE_NAME_MAP = {
     'UC_IZZTCF': 'İletişim',
     'UC_P2WVHX': 'Takip',
 }
+STAGE_NAME_MAP = MappingProxyType({sys.intern(k): v for k, v in STAGE_NAME_MAP.items()})
 
+@lru_cache(maxsize=4096)
 def get_stage_name(stage_id: str) -> str:
     """Convert stage ID to human-readable name"""
     if not stage_id:
@@ -318,8 +431,8 @@ def get_stage_name(stage_id: str) -> str:
     return stage_id
 
 
-# Category ID to Name mapping
-CATEGORY_NAME_MAP = {
+# Category ID to Name mapping (read-only)
+CATEGORY_NAME_MAP: Mapping[str, str] = {
     '0': 'Genel',
     '24': 'Satış Yönetimi',
     '26': 'Müşteri İlişkileri',
@@ -340,7 +453,9 @@ CATEGORY_NAME_MAP = {
     '64': 'Satın Alma',
     '66': 'Üretim',
 }
+CATEGORY_NAME_MAP = MappingProxyType({sys.intern(k): v for k, v in CATEGORY_NAME_MAP.items()})
 
+@lru_cache(maxsize=4096)
 def get_category_name(category_id: str) -> str:
     """Get human-readable category name"""
     if not category_id:
@@ -348,54 +463,396 @@ def get_category_name(category_id: str) -> str:
     return CATEGORY_NAME_MAP.get(category_id, f'Kategori {category_id}')
 
 
+# ============================================================================
+# SQL STATEMENTS (compiled once at import)
+# ============================================================================
+
+_Q_INSERT_SUMMARY = text("""
+    INSERT INTO bitrix.ai_summaries 
+    (deal_id, deal_title, summary, provider, model, created_at, written_to_bitrix)
+    VALUES (:deal_id, :deal_title, :summary, :provider, :model, NOW(), false)
+    RETURNING id, created_at
+""")
+
+_Q_INSERT_SUMMARIES_BATCH = text("""
+    INSERT INTO bitrix.ai_summaries 
+    (deal_id, deal_title, summary, provider, model, created_at, written_to_bitrix)
+    SELECT t.deal_id, t.deal_title, t.summary, :provider, :model, NOW(), false
+    FROM unnest(
+        CAST(:deal_ids AS bigint[]),
+        CAST(:deal_titles AS varchar[]),
+        CAST(:summaries AS text[])
+    ) AS t(deal_id, deal_title, summary)
+    RETURNING id, deal_id, created_at
+""")
+
+_Q_MARK_WRITTEN = text("""
+    UPDATE bitrix.ai_summaries 
+    SET written_to_bitrix = true, bitrix_write_at = NOW() 
+    WHERE id = :id
+""")
+
+_Q_BITRIX_STATUS = text("""
+    SELECT id, deal_id, written_to_bitrix, bitrix_write_at
+    FROM bitrix.ai_summaries
+    WHERE id = :summary_id
+""")
+
+_Q_GET_SUMMARY = text("""
+    SELECT 
+        id,
+        deal_id,
+        deal_title,
+        summary,
+        provider,
+        model,
+        created_at,
+        written_to_bitrix
+    FROM bitrix.ai_summaries
+    WHERE id = :summary_id
+""")
+
+# Row lock held through the Bitrix write so concurrent writes of the same
+# summary run one after another instead of racing on written_to_bitrix
+_Q_WRITE_LOOKUP = text("""
+    SELECT deal_id, summary 
+    FROM bitrix.ai_summaries 
+    WHERE id = :summary_id
+    FOR UPDATE
+""")
+
+_Q_DELETE_SUMMARY = text("DELETE FROM bitrix.ai_summaries WHERE id = :summary_id RETURNING id")
+
+# O(1) row estimate from planner statistics (-1 if the table was never analyzed)
+_Q_DEALS_ESTIMATED_COUNT = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = 'bitrix.deals'::regclass"
+)
+
+
+def _history_queries(by_deal: bool):
+    """Page + count statements for /history, with or without a deal filter"""
+    where_clause = "deal_id = :deal_id" if by_deal else "1=1"
+    page_query = text(f"""
+        SELECT 
+            id,
+            deal_id,
+            deal_title,
+            summary_preview,
+            provider,
+            model,
+            created_at,
+            written_to_bitrix
+        FROM bitrix.ai_summaries
+        WHERE {where_clause}
+        ORDER BY created_at DESC
+        LIMIT :limit OFFSET :offset
+    """)
+    count_query = text(f"SELECT COUNT(*) FROM bitrix.ai_summaries WHERE {where_clause}")
+    return page_query, count_query
+
+
+_Q_HISTORY = {by_deal: _history_queries(by_deal) for by_deal in (False, True)}
+
+
+def _sql_literal(value: str) -> str:
+    """Quote a static string as a SQL literal"""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _sql_values(mapping: Mapping[str, str]) -> str:
+    """Render a static str -> str map as a SQL VALUES list"""
+    return "VALUES " + ", ".join(f"({_sql_literal(k)}, {_sql_literal(v)})" for k, v in mapping.items())
+
+
+def _terminal_stage_ids(semantic: str) -> Tuple[str, ...]:
+    """
+    All known stage IDs for a terminal semantic ('WON' / 'LOSE')
+    
+    Bitrix names them '<SEMANTIC>' in the default pipeline and
+    'C<category>:<SEMANTIC>' elsewhere; every mapped stage and category is
+    covered, so the filter is a plain equality list on idx_deals_stage.
+    """
+    ids = {k for k in STAGE_NAME_MAP if k == semantic or k.endswith(f":{semantic}")}
+    ids.update(f"C{category_id}:{semantic}" for category_id in CATEGORY_NAME_MAP if category_id != '0')
+    ids.add(semantic)
+    return tuple(sorted(ids))
+
+
+WON_STAGE_IDS = _terminal_stage_ids("WON")
+LOSE_STAGE_IDS = _terminal_stage_ids("LOSE")
+
+
+def _sql_in_list(values: Tuple[str, ...]) -> str:
+    """Render static strings as a SQL IN list"""
+    return "(" + ", ".join(_sql_literal(v) for v in values) + ")"
+
+
+# Status filter -> stage condition ('all' or unknown values add no filter)
+# Literal IN lists rather than '%WON%' wildcards, so the planner can use the
+# stage_id index and see the exact values for its row estimates
+STATUS_CONDITIONS = {
+    "active": f"d.stage_id NOT IN {_sql_in_list(WON_STAGE_IDS + LOSE_STAGE_IDS)}",
+    "won": f"d.stage_id IN {_sql_in_list(WON_STAGE_IDS)}",
+    "lost": f"d.stage_id IN {_sql_in_list(LOSE_STAGE_IDS)}",
+}
+
+
+_STAGE_NAMES_SQL = _sql_values(STAGE_NAME_MAP)
+_CATEGORY_NAMES_SQL = _sql_values(CATEGORY_NAME_MAP)
+
+
+def _stage_name_sql(column: str) -> Tuple[str, str]:
+    """
+    SQL equivalent of get_stage_name() for a stage_id column
+    
+    Returns (joins, expression): exact match on the full ID, then on the
+    part after ':', then the same fallbacks get_stage_name() uses.
+    """
+    joins = f"""
+        LEFT JOIN ({_STAGE_NAMES_SQL}) sm(stage_id, stage_name) ON sm.stage_id = {column}
+        LEFT JOIN ({_STAGE_NAMES_SQL}) ss(stage_id, stage_name) ON ss.stage_id = split_part({column}, ':', 2)"""
+    expression = f"""CASE
+            WHEN {column} IS NULL OR {column} = '' THEN 'Bilinmeyen'
+            WHEN sm.stage_name IS NOT NULL THEN sm.stage_name
+            WHEN strpos({column}, ':') = 0 THEN {column}
+            WHEN ss.stage_name IS NOT NULL THEN ss.stage_name
+            WHEN split_part({column}, ':', 2) LIKE 'UC\\_%' THEN 'Özel Aşama (' || split_part({column}, ':', 1) || ')'
+            ELSE COALESCE(NULLIF(split_part({column}, ':', 2), ''), {column})
+        END"""
+    return joins, expression
+
+
+def _category_name_sql(column: str) -> Tuple[str, str]:
+    """SQL equivalent of get_category_name() for a category_id column"""
+    joins = f"""
+        LEFT JOIN ({_CATEGORY_NAMES_SQL}) cm(category_id, category_name) ON cm.category_id = {column}"""
+    expression = f"""CASE
+            WHEN {column} IS NULL OR {column} = '' THEN 'Belirsiz'
+            ELSE COALESCE(cm.category_name, 'Kategori ' || {column})
+        END"""
+    return joins, expression
+
+
+def _deals_conditions(search: bool, category: bool, stage: bool, status: Optional[str]) -> List[str]:
+    """WHERE conditions shared by the deal list and its count"""
+    conditions = []
+    if search:
+        conditions.append("lower(d.title) LIKE :search")
+    if category:
+        conditions.append("d.category_id = :category_id")
+    if stage:
+        conditions.append("d.stage_id = :stage_id")
+    if status in STATUS_CONDITIONS:
+        conditions.append(STATUS_CONDITIONS[status])
+    return conditions
+
+
+@lru_cache(maxsize=None)
+def _deals_list_query(search: bool, category: bool, stage: bool, status: Optional[str], with_total: bool, keyset: bool):
+    """
+    Build the list_deals statement for one filter combination
+    
+    The set of combinations is small and fixed, so each variant is compiled
+    once and reused; all values go through bind parameters.
+    With keyset, the page starts after (cursor_date, cursor_id) instead of
+    OFFSET, so deep pages seek on idx_deals_date_modify_id.
+    """
+    conditions = _deals_conditions(search, category, stage, status)
+    if keyset:
+        conditions.append("(d.date_modify, d.id) < (:cursor_date, :cursor_id)")
+    
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    total_column = ",\n            COUNT(*) OVER () as _total" if with_total else ""
+    stage_joins, stage_name = _stage_name_sql("d.stage_id")
+    
+    return text(f"""
+        SELECT 
+            d.id,
+            d.title,
+            d.stage_id,
+            {stage_name} as stage_name,
+            d.opportunity,
+            d.currency_id as currency,
+            d.date_create,
+            d.date_modify,
+            COALESCE(c.full_name, CONCAT(c.name, ' ', c.last_name)) as contact_name,
+            comp.title as company_name,
+            u.full_name as assigned_by_name,
+            s.deal_id IS NOT NULL as has_summary,
+            s.last_summary_at{total_column}
+        FROM bitrix.deals d
+        LEFT JOIN bitrix.contacts c ON d.contact_id = c.bitrix_id
+        LEFT JOIN bitrix.companies comp ON d.company_id = comp.bitrix_id
+        LEFT JOIN bitrix.users u ON d.assigned_by_id = u.id_text
+        LEFT JOIN (
+            SELECT deal_id, MAX(created_at) as last_summary_at
+            FROM bitrix.ai_summaries
+            GROUP BY deal_id
+        ) s ON s.deal_id = d.id{stage_joins}
+        WHERE {where_clause}
+        ORDER BY d.date_modify DESC NULLS LAST, d.id DESC
+        LIMIT :limit{"" if keyset else " OFFSET :offset"}
+    """)
+
+
+@lru_cache(maxsize=None)
+def _deals_count_query(search: bool, category: bool, stage: bool, status: Optional[str]):
+    """Filtered deal count for keyset pages, where COUNT(*) OVER () would only see the tail"""
+    conditions = _deals_conditions(search, category, stage, status)
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    return text(f"SELECT COUNT(*) FROM bitrix.deals d WHERE {where_clause}")
+
+
+@lru_cache(maxsize=None)
+def _categories_query(status: Optional[str]):
+    """Category counts statement for one status filter"""
+    status_condition = f"AND {STATUS_CONDITIONS[status]}" if status in STATUS_CONDITIONS else ""
+    category_joins, category_name = _category_name_sql("g.category_id")
+    return text(f"""
+        SELECT 
+            g.category_id,
+            g.deal_count,
+            {category_name} as category_name
+        FROM (
+            SELECT d.category_id, COUNT(*) as deal_count
+            FROM bitrix.deals d
+            WHERE d.category_id IS NOT NULL {status_condition}
+            GROUP BY d.category_id
+        ) g{category_joins}
+        ORDER BY g.deal_count DESC
+    """)
+
+
+@lru_cache(maxsize=None)
+def _stages_query(status: Optional[str], category: bool):
+    """Stage counts statement for one status/category filter combination"""
+    conditions = ["d.stage_id IS NOT NULL"]
+    if status in STATUS_CONDITIONS:
+        conditions.append(STATUS_CONDITIONS[status])
+    if category:
+        conditions.append("d.category_id = :category_id")
+    
+    where_clause = " AND ".join(conditions)
+    stage_joins, stage_name = _stage_name_sql("g.stage_id")
+    return text(f"""
+        SELECT 
+            g.stage_id,
+            g.deal_count,
+            {stage_name} as stage_name
+        FROM (
+            SELECT d.stage_id, COUNT(*) as deal_count
+            FROM bitrix.deals d
+            WHERE {where_clause}
+            GROUP BY d.stage_id
+        ) g{stage_joins}
+        ORDER BY g.deal_count DESC
+    """)
+
+
+def _json_default(value: Any) -> Any:
+    """orjson fallback for NUMERIC columns"""
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+def _json_response(payload: Any) -> Response:
+    """Serialize straight to JSON bytes, bypassing jsonable_encoder"""
+    return Response(content=orjson.dumps(payload, default=_json_default), media_type="application/json")
+
+
+async def _fetch_dicts(session: AsyncSession, query, params: dict) -> List[dict]:
+    """
+    Fetch rows as plain dicts, zipping column names once instead of per-row _mapping
+    
+    Iterates the buffered result directly so no intermediate list of Row
+    objects is built; pages are capped at 100 rows, so a server-side cursor
+    would only add round trips.
+    """
+    result = await session.execute(query, params)
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+async def _run_page_queries(query, params: dict, count_query, count_params: dict):
+    """
+    Run a page query and its COUNT(*) concurrently
+    
+    asyncpg allows one operation per connection, so each statement gets
+    its own session; latency becomes max(select, count) instead of the sum.
+    """
+    async def _rows():
+        async with ReadOnlySessionLocal() as session:
+            return await _fetch_dicts(session, query, params)
+    
+    async def _count():
+        async with ReadOnlySessionLocal() as session:
+            return (await session.execute(count_query, count_params)).scalar()
+    
+    return await asyncio.gather(_rows(), _count())
+
+
+async def _write_summary(deal_id: int, summary: str, write_mode: str) -> dict:
+    """Write a summary to Bitrix24 as a timeline comment or into deal comments"""
+    writer = BitrixSummaryWriter()
+    if write_mode == "timeline":
+        result = await writer.add_deal_timeline_comment(deal_id, summary)
+    else:
+        result = await writer.update_deal_comment(deal_id, summary)
+    
+    if result.get("success"):
+        invalidate_collected_data(deal_id)
+    return result
+
+
+async def _write_summary_and_mark(summary_id: int, deal_id: int, summary: str, write_mode: str) -> None:
+    """
+    Background task: write a stored summary to Bitrix24 and flag it on success
+    
+    Runs after the response is sent, so it uses its own session rather than
+    the (already closed) request session.
+    """
+    try:
+        bitrix_result = await _write_summary(deal_id, summary, write_mode)
+        if not bitrix_result.get("success"):
+            logger.warning("background_bitrix_write_failed", summary_id=summary_id, deal_id=deal_id, error=bitrix_result.get("error"))
+            return
+        
+        async with AsyncSessionLocal() as session:
+            await session.execute(_Q_MARK_WRITTEN, {"id": summary_id})
+            await session.commit()
+    except Exception as e:
+        logger.error("background_bitrix_write_error", summary_id=summary_id, deal_id=deal_id, error=e)
+
+
 @router.get("/categories")
 async def get_deal_categories(
+    request: Request,
     status: Optional[str] = Query(default="active", description="Filter: 'active', 'won', 'lost', 'all'"),
     db: AsyncSession = Depends(get_db)
-) -> List[dict]:
+) -> Response:
     """
     Get available deal categories (pipelines) for filtering
     """
     try:
-        # Build status condition
-        status_condition = ""
-        if status == "active":
-            status_condition = "AND stage_id NOT LIKE '%LOSE%' AND stage_id NOT LIKE '%WON%'"
-        elif status == "won":
-            status_condition = "AND stage_id LIKE '%WON%'"
-        elif status == "lost":
-            status_condition = "AND stage_id LIKE '%LOSE%'"
-        
-        query = text(f"""
-            SELECT DISTINCT 
-                category_id,
-                COUNT(*) as deal_count
-            FROM bitrix.deals
-            WHERE category_id IS NOT NULL {status_condition}
-            GROUP BY category_id
-            ORDER BY deal_count DESC
-        """)
-        
-        result = await db.execute(query)
-        categories_raw = [dict(row._mapping) for row in result.fetchall()]
-        
-        # Add category_name to each category
-        categories = []
-        for cat in categories_raw:
-            cat['category_name'] = get_category_name(cat.get('category_id'))
-            categories.append(cat)
-        
-        return categories
+        status_key = status if status in STATUS_CONDITIONS else None
+        cached = _cache_get(_categories_cache, (status_key,))
+        if cached is None:
+            categories = await _fetch_dicts(db, _categories_query(status_key), {})
+            body = _json_response(categories).body
+            cached = (body, _etag(body))
+            _cache_set(_categories_cache, (status_key,), cached, LOOKUP_CACHE_TTL)
+        return _conditional_response(request, *cached)
         
     except Exception as e:
-        logger.error("get_deal_categories_failed", error=str(e))
+        logger.error("get_deal_categories_failed", error=e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
 
-@router.get("/deals")
+@router.get("/deals", responses={200: {"model": DealListPage}})
 async def list_deals(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, le=100),
@@ -403,8 +860,10 @@ async def list_deals(
     category_id: Optional[str] = Query(default=None, description="Filter by category/pipeline"),
     stage_id: Optional[str] = Query(default=None),
     status: Optional[str] = Query(default="active", description="Filter: 'active', 'won', 'lost', 'all'"),
-    db: AsyncSession = Depends(get_db)
-) -> dict:
+    exact_count: bool = Query(default=False, description="Exact total even for unfiltered listing"),
+    cursor_date: Optional[datetime] = Query(default=None, description="Keyset cursor: date_modify of the last row seen"),
+    cursor_id: Optional[int] = Query(default=None, description="Keyset cursor: id of the last row seen"),
+) -> Response:
     """
     List deals with summary status
     Status filter:
@@ -412,95 +871,73 @@ async def list_deals(
     - won: Only WON stages
     - lost: Only LOSE stages
     - all: All deals
+    
+    Total comes from COUNT(*) OVER () on the page query; unfiltered listing
+    uses the planner's row estimate unless exact_count is set.
+    
+    Pass next_cursor's cursor_date/cursor_id back to fetch the following
+    page without OFFSET; page is then only echoed back. The total always
+    covers the whole filter, not just the rows after the cursor.
     """
     try:
-        offset = (page - 1) * page_size
+        keyset = cursor_date is not None and cursor_id is not None
         
-        # Build query
-        conditions = []
-        params = {"limit": page_size, "offset": offset}
+        params = {"limit": page_size}
+        if keyset:
+            params["cursor_date"] = cursor_date
+            params["cursor_id"] = cursor_id
+        else:
+            params["offset"] = (page - 1) * page_size
         
         if search:
-            conditions.append("d.title ILIKE :search")
-            params["search"] = f"%{search}%"
-        
+            params["search"] = f"%{search.lower()}%"
         if category_id:
-            conditions.append("d.category_id = :category_id")
             params["category_id"] = category_id
-        
         if stage_id:
-            conditions.append("d.stage_id = :stage_id")
             params["stage_id"] = stage_id
         
-        # Status filter
-        if status == "active":
-            conditions.append("d.stage_id NOT LIKE '%LOSE%' AND d.stage_id NOT LIKE '%WON%'")
-        elif status == "won":
-            conditions.append("d.stage_id LIKE '%WON%'")
-        elif status == "lost":
-            conditions.append("d.stage_id LIKE '%LOSE%'")
-        # status == "all" -> no filter
-        
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
+        status_key = status if status in STATUS_CONDITIONS else None
+        filtered = bool(search or category_id or stage_id or status_key)
+        use_estimate = not filtered and not exact_count
         
         # Get deals with contact/company names - using direct columns
-        query = text(f"""
-            SELECT 
-                d.id,
-                d.title,
-                d.stage_id,
-                d.opportunity,
-                d.currency_id as currency,
-                d.date_create,
-                d.date_modify,
-                COALESCE(c.full_name, CONCAT(c.name, ' ', c.last_name)) as contact_name,
-                comp.title as company_name,
-                CONCAT(u.name, ' ', u.last_name) as assigned_by_name,
-                CASE WHEN s.id IS NOT NULL THEN true ELSE false END as has_summary,
-                s.created_at as last_summary_at
-            FROM bitrix.deals d
-            LEFT JOIN bitrix.contacts c ON d.contact_id = c.bitrix_id
-            LEFT JOIN bitrix.companies comp ON d.company_id = comp.bitrix_id
-            LEFT JOIN bitrix.users u ON d.assigned_by_id::int = u.id
-            LEFT JOIN LATERAL (
-                SELECT id, created_at 
-                FROM bitrix.ai_summaries 
-                WHERE deal_id = d.id 
-                ORDER BY created_at DESC 
-                LIMIT 1
-            ) s ON true
-            WHERE {where_clause}
-            ORDER BY d.date_modify DESC NULLS LAST
-            LIMIT :limit OFFSET :offset
-        """)
-        
-        result = await db.execute(query, params)
-        deals_raw = [dict(row._mapping) for row in result.fetchall()]
-        
-        # Add stage_name to each deal
-        deals = []
-        for deal in deals_raw:
-            deal['stage_name'] = get_stage_name(deal.get('stage_id'))
-            deals.append(deal)
-        
-        # Get total count
-        count_query = text(f"""
-            SELECT COUNT(*) FROM bitrix.deals d WHERE {where_clause}
-        """)
-        count_params = {k: v for k, v in params.items() if k not in ["limit", "offset"]}
-        count_result = await db.execute(count_query, count_params)
-        total = count_result.scalar()
+        query = _deals_list_query(
+            bool(search), bool(category_id), bool(stage_id), status_key,
+            not use_estimate and not keyset, keyset
+        )
         
-        return {
-            "items": deals,
+        if use_estimate:
+            deals_raw, total = await _run_page_queries(query, params, _Q_DEALS_ESTIMATED_COUNT, {})
+            total = max(int(total or 0), 0)
+        elif keyset:
+            count_query = _deals_count_query(bool(search), bool(category_id), bool(stage_id), status_key)
+            count_params = {k: params[k] for k in ("search", "category_id", "stage_id") if k in params}
+            deals_raw, total = await _run_page_queries(query, params, count_query, count_params)
+        else:
+            async with ReadOnlySessionLocal() as session:
+                deals_raw = await _fetch_dicts(session, query, params)
+            total = deals_raw[0]["_total"] if deals_raw else 0
+            for deal in deals_raw:
+                del deal["_total"]
+        
+        next_cursor = None
+        if len(deals_raw) == page_size and deals_raw[-1]["date_modify"] is not None:
+            next_cursor = {
+                "cursor_date": deals_raw[-1]["date_modify"],
+                "cursor_id": deals_raw[-1]["id"],
+            }
+        
+        return _json_response({
+            "items": deals_raw,
             "total": total,
             "page": page,
             "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
-        }
+            "total_pages": (total + page_size - 1) // page_size,
+            "next_cursor": next_cursor
+        })
         
     except Exception as e:
-        logger.error("list_deals_failed", error=str(e))
+        logger.error("list_deals_failed", error=e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -544,7 +981,7 @@ async def get_deal_details(
             detail=str(e)
         )
     except Exception as e:
-        logger.error("get_deal_details_failed", deal_id=deal_id, error=str(e))
+        logger.error("get_deal_details_failed", deal_id=deal_id, error=e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -565,74 +1002,45 @@ async def generate_summary(
         collector = CustomerDataCollector(db)
         customer_data = await collector.collect_all_data(request.deal_id)
         
-        # Map provider enum
-        provider_map = {
-            AIProviderEnum.openai: AIProvider.OPENAI,
-            AIProviderEnum.claude: AIProvider.CLAUDE,
-            AIProviderEnum.gemini: AIProvider.GEMINI,
-            AIProviderEnum.openrouter: AIProvider.OPENROUTER,
-            AIProviderEnum.ollama: AIProvider.OLLAMA
-        }
-        
         # Generate summary
         summarizer = AISummarizer(
-            provider=provider_map[request.provider],
+            provider=PROVIDER_MAP[request.provider],
             model=request.model
         )
         
         summary_text = await summarizer.generate_summary(customer_data)
         
         # Save to database
-        insert_query = text("""
-            INSERT INTO bitrix.ai_summaries 
-            (deal_id, deal_title, summary, provider, model, created_at, written_to_bitrix)
-            VALUES (:deal_id, :deal_title, :summary, :provider, :model, NOW(), false)
-            RETURNING id, created_at
-        """)
-        
-        result = await db.execute(insert_query, {
+        result = await db.execute(_Q_INSERT_SUMMARY, {
             "deal_id": request.deal_id,
             "deal_title": customer_data["deal"].get("title", ""),
             "summary": summary_text,
             "provider": request.provider.value,
             "model": request.model or summarizer.model
         })
+        row = result.fetchone()
         await db.commit()
         
-        row = result.fetchone()
         summary_id = row.id
         created_at = row.created_at
         
-        # Write to Bitrix24 if requested
-        bitrix_result = None
+        # Write to Bitrix24 after the response is sent;
+        # poll /history/{id}/bitrix-status for the outcome
         if request.write_to_bitrix:
-            writer = BitrixSummaryWriter()
-            
-            if request.write_mode == "timeline":
-                bitrix_result = await writer.add_deal_timeline_comment(
-                    request.deal_id, 
-                    summary_text
-                )
-            else:
-                bitrix_result = await writer.update_deal_comment(
-                    request.deal_id, 
-                    summary_text
-                )
-            
-            # Update database
-            if bitrix_result.get("success"):
-                await db.execute(
-                    text("UPDATE bitrix.ai_summaries SET written_to_bitrix = true WHERE id = :id"),
-                    {"id": summary_id}
-                )
-                await db.commit()
+            background_tasks.add_task(
+                _write_summary_and_mark,
+                summary_id,
+                request.deal_id,
+                summary_text,
+                request.write_mode
+            )
         
         logger.info(
             "summary_generated",
             deal_id=request.deal_id,
             summary_id=summary_id,
             provider=request.provider.value,
-            written_to_bitrix=request.write_to_bitrix
+            bitrix_write_pending=request.write_to_bitrix
         )
         
         return SummaryResponse(
@@ -643,8 +1051,8 @@ async def generate_summary(
             provider=request.provider.value,
             model=request.model or summarizer.model,
             created_at=created_at,
-            written_to_bitrix=bitrix_result.get("success", False) if bitrix_result else False,
-            bitrix_write_result=bitrix_result
+            written_to_bitrix=False,
+            bitrix_write_pending=request.write_to_bitrix
         )
         
     except ValueError as e:
@@ -653,100 +1061,183 @@ async def generate_summary(
             detail=str(e)
         )
     except Exception as e:
-        logger.error("generate_summary_failed", deal_id=request.deal_id, error=str(e))
+        logger.error("generate_summary_failed", deal_id=request.deal_id, error=e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+# Upper bound on concurrent AI provider calls per batch (provider rate limits)
+BATCH_AI_CONCURRENCY = 8
+
+
+@router.post("/generate/batch")
+async def generate_summaries_batch(
+    request: GenerateBatchRequest,
+    db: AsyncSession = Depends(get_db)
+) -> dict:
+    """
+    Generate AI summaries for several deals in one request
+    
+    Deals are loaded together, AI calls run concurrently (bounded), and all
+    successful summaries are stored with a single INSERT. Per-deal failures
+    are reported in 'failed' without aborting the batch.
+    """
+    try:
+        collector = CustomerDataCollector(db)
+        customer_data_by_deal = await collector.collect_many(request.deal_ids)
+        
+        failed = [
+            {"deal_id": deal_id, "error": f"Deal {deal_id} not found"}
+            for deal_id in dict.fromkeys(request.deal_ids)
+            if deal_id not in customer_data_by_deal
+        ]
+        
+        summarizer = AISummarizer(
+            provider=PROVIDER_MAP[request.provider],
+            model=request.model
+        )
+        semaphore = asyncio.Semaphore(BATCH_AI_CONCURRENCY)
+        
+        async def summarize(customer_data: dict) -> str:
+            async with semaphore:
+                return await summarizer.generate_summary(customer_data)
+        
+        deal_ids = list(customer_data_by_deal)
+        results = await asyncio.gather(
+            *(summarize(customer_data_by_deal[deal_id]) for deal_id in deal_ids),
+            return_exceptions=True
+        )
+        
+        generated = {}
+        for deal_id, result in zip(deal_ids, results):
+            if isinstance(result, BaseException):
+                failed.append({"deal_id": deal_id, "error": str(result)})
+            else:
+                generated[deal_id] = result
+        
+        items = []
+        if generated:
+            model = request.model or summarizer.model
+            result = await db.execute(_Q_INSERT_SUMMARIES_BATCH, {
+                "deal_ids": list(generated),
+                "deal_titles": [customer_data_by_deal[d]["deal"].get("title", "") for d in generated],
+                "summaries": list(generated.values()),
+                "provider": request.provider.value,
+                "model": model
+            })
+            rows = result.fetchall()
+            await db.commit()
+            
+            items = [
+                SummaryResponse(
+                    id=row.id,
+                    deal_id=row.deal_id,
+                    deal_title=customer_data_by_deal[row.deal_id]["deal"].get("title"),
+                    summary=generated[row.deal_id],
+                    provider=request.provider.value,
+                    model=model,
+                    created_at=row.created_at
+                )
+                for row in rows
+            ]
+        
+        logger.info(
+            "summary_batch_generated",
+            requested=len(request.deal_ids),
+            generated=len(items),
+            failed=len(failed),
+            provider=request.provider.value
+        )
+        
+        return {"items": items, "failed": failed}
+        
+    except Exception as e:
+        logger.error("generate_summaries_batch_failed", deal_count=len(request.deal_ids), error=e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
 
-@router.get("/history")
+@router.get("/history", responses={200: {"model": SummaryHistoryPage}})
 async def get_summary_history(
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, le=100),
     deal_id: Optional[int] = Query(default=None),
-    db: AsyncSession = Depends(get_db)
-) -> dict:
+) -> Response:
     """
     Get summary generation history
     """
     try:
         offset = (page - 1) * page_size
         
-        conditions = []
         params = {"limit": page_size, "offset": offset}
+        count_params = {}
         
         if deal_id:
-            conditions.append("deal_id = :deal_id")
-            params["deal_id"] = deal_id
-        
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
-        
-        query = text(f"""
-            SELECT 
-                id,
-                deal_id,
-                deal_title,
-                LEFT(summary, 200) as summary_preview,
-                provider,
-                model,
-                created_at,
-                written_to_bitrix
-            FROM bitrix.ai_summaries
-            WHERE {where_clause}
-            ORDER BY created_at DESC
-            LIMIT :limit OFFSET :offset
-        """)
-        
-        result = await db.execute(query, params)
-        items = [dict(row._mapping) for row in result.fetchall()]
+            params["deal_id"] = count_params["deal_id"] = deal_id
         
-        # Get total count
-        count_query = text(f"SELECT COUNT(*) FROM bitrix.ai_summaries WHERE {where_clause}")
-        count_params = {k: v for k, v in params.items() if k not in ["limit", "offset"]}
-        count_result = await db.execute(count_query, count_params)
-        total = count_result.scalar()
+        query, count_query = _Q_HISTORY[bool(deal_id)]
+        items, total = await _run_page_queries(query, params, count_query, count_params)
         
-        return {
+        return _json_response({
             "items": items,
             "total": total,
             "page": page,
             "page_size": page_size,
             "total_pages": (total + page_size - 1) // page_size
-        }
+        })
         
     except Exception as e:
-        logger.error("get_summary_history_failed", error=str(e))
+        logger.error("get_summary_history_failed", error=e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
 
-@router.get("/history/{summary_id}")
+@router.get("/history/{summary_id}", responses={200: {"model": SummaryResponse}})
 async def get_summary_detail(
     summary_id: int,
     db: AsyncSession = Depends(get_db)
-) -> dict:
+) -> Response:
     """
     Get full summary detail
     """
     try:
-        query = text("""
-            SELECT 
-                id,
-                deal_id,
-                deal_title,
-                summary,
-                provider,
-                model,
-                created_at,
-                written_to_bitrix
-            FROM bitrix.ai_summaries
-            WHERE id = :summary_id
-        """)
+        result = await db.execute(_Q_GET_SUMMARY, {"summary_id": summary_id})
+        row = result.fetchone()
+        
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Summary {summary_id} not found"
+            )
+        
+        return _json_response(dict(row._mapping))
         
-        result = await db.execute(query, {"summary_id": summary_id})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("get_summary_detail_failed", summary_id=summary_id, error=e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get("/history/{summary_id}/bitrix-status")
+async def get_summary_bitrix_status(
+    summary_id: int,
+    db: AsyncSession = Depends(get_db)
+) -> dict:
+    """
+    Get Bitrix24 write status of a summary (for background writes)
+    """
+    try:
+        result = await db.execute(_Q_BITRIX_STATUS, {"summary_id": summary_id})
         row = result.fetchone()
         
         if not row:
@@ -760,7 +1251,7 @@ async def get_summary_detail(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error("get_summary_detail_failed", summary_id=summary_id, error=str(e))
+        logger.error("get_summary_bitrix_status_failed", summary_id=summary_id, error=e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -776,13 +1267,8 @@ async def write_summary_to_bitrix(
     Write an existing summary to Bitrix24
     """
     try:
-        # Get summary
-        query = text("""
-            SELECT deal_id, summary 
-            FROM bitrix.ai_summaries 
-            WHERE id = :summary_id
-        """)
-        result = await db.execute(query, {"summary_id": request.summary_id})
+        # Get summary (locks the row until commit)
+        result = await db.execute(_Q_WRITE_LOOKUP, {"summary_id": request.summary_id})
         row = result.fetchone()
         
         if not row:
@@ -795,27 +1281,19 @@ async def write_summary_to_bitrix(
         summary = row.summary
         
         # Write to Bitrix24
-        writer = BitrixSummaryWriter()
+        bitrix_result = await _write_summary(deal_id, summary, request.write_mode)
         
-        if request.write_mode == "timeline":
-            bitrix_result = await writer.add_deal_timeline_comment(deal_id, summary)
-        else:
-            bitrix_result = await writer.update_deal_comment(deal_id, summary)
-        
-        # Update database
+        # Update database - same transaction, commit releases the lock
         if bitrix_result.get("success"):
-            await db.execute(
-                text("UPDATE bitrix.ai_summaries SET written_to_bitrix = true WHERE id = :id"),
-                {"id": request.summary_id}
-            )
-            await db.commit()
+            await db.execute(_Q_MARK_WRITTEN, {"id": request.summary_id})
+        await db.commit()
         
         return bitrix_result
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error("write_to_bitrix_failed", summary_id=request.summary_id, error=str(e))
+        logger.error("write_to_bitrix_failed", summary_id=request.summary_id, error=e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -831,8 +1309,7 @@ async def delete_summary(
     Delete a summary from history
     """
     try:
-        query = text("DELETE FROM bitrix.ai_summaries WHERE id = :summary_id RETURNING id")
-        result = await db.execute(query, {"summary_id": summary_id})
+        result = await db.execute(_Q_DELETE_SUMMARY, {"summary_id": summary_id})
         await db.commit()
         
         row = result.fetchone()
@@ -847,7 +1324,7 @@ async def delete_summary(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error("delete_summary_failed", summary_id=summary_id, error=str(e))
+        logger.error("delete_summary_failed", summary_id=summary_id, error=e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -856,52 +1333,28 @@ async def delete_summary(
 
 @router.get("/stages")
 async def get_deal_stages(
+    request: Request,
     status: Optional[str] = Query(default="active", description="Filter: 'active', 'won', 'lost', 'all'"),
     category_id: Optional[str] = Query(default=None, description="Filter by category/pipeline"),
     db: AsyncSession = Depends(get_db)
-) -> List[dict]:
+) -> Response:
     """
     Get available deal stages for filtering
     """
     try:
-        # Build conditions
-        conditions = ["stage_id IS NOT NULL"]
-        
-        if status == "active":
-            conditions.append("stage_id NOT LIKE '%LOSE%' AND stage_id NOT LIKE '%WON%'")
-        elif status == "won":
-            conditions.append("stage_id LIKE '%WON%'")
-        elif status == "lost":
-            conditions.append("stage_id LIKE '%LOSE%'")
-        
-        if category_id:
-            conditions.append(f"category_id = '{category_id}'")
-        
-        where_clause = " AND ".join(conditions)
-        
-        query = text(f"""
-            SELECT DISTINCT 
-                stage_id,
-                COUNT(*) as deal_count
-            FROM bitrix.deals
-            WHERE {where_clause}
-            GROUP BY stage_id
-            ORDER BY deal_count DESC
-        """)
-        
-        result = await db.execute(query)
-        stages_raw = [dict(row._mapping) for row in result.fetchall()]
-        
-        # Add stage_name to each stage
-        stages = []
-        for stage in stages_raw:
-            stage['stage_name'] = get_stage_name(stage.get('stage_id'))
-            stages.append(stage)
-        
-        return stages
+        status_key = status if status in STATUS_CONDITIONS else None
+        cache_key = (status_key, category_id)
+        cached = _cache_get(_stages_cache, cache_key)
+        if cached is None:
+            params = {"category_id": category_id} if category_id else {}
+            stages = await _fetch_dicts(db, _stages_query(status_key, bool(category_id)), params)
+            body = _json_response(stages).body
+            cached = (body, _etag(body))
+            _cache_set(_stages_cache, cache_key, cached, LOOKUP_CACHE_TTL)
+        return _conditional_response(request, *cached)
         
     except Exception as e:
-        logger.error("get_deal_stages_failed", error=str(e))
+        logger.error("get_deal_stages_failed", error=e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -8,18 +8,24 @@ Enables:
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
+from functools import lru_cache
+import asyncio
+import httpx
 import structlog
-import json
+import hashlib
+import orjson
 import os
+from urllib.parse import urlencode
 
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.schemas.sheets import (
     SheetSyncConfigCreate,
     SheetSyncConfigResponse,
     SyncChangesRequest,
-    SyncChangesResponse
+    SyncChangesResponse,
+    SyncToSheetBatchRequest
 )
 from app.services.google_sheets_api import GoogleSheetsService
 
@@ -36,6 +42,139 @@ ENTITY_API_MAP = {
     'tasks': {'method': 'tasks.task.update', 'id_field': 'id'},
 }
 
+# Common field mappings (lowercase to Bitrix format)
+_COMMON_FIELD_MAPPINGS = {
+    'name': 'NAME',
+    'title': 'TITLE',
+    'phone': 'PHONE',
+    'email': 'EMAIL',
+    'company_id': 'COMPANY_ID',
+    'contact_id': 'CONTACT_ID',
+    'assigned_by_id': 'ASSIGNED_BY_ID',
+    'responsible_id': 'RESPONSIBLE_ID',
+    'status_id': 'STATUS_ID',
+    'stage_id': 'STAGE_ID',
+    'opportunity': 'OPPORTUNITY',
+    'comments': 'COMMENTS',
+    'source_id': 'SOURCE_ID',
+    'source_description': 'SOURCE_DESCRIPTION',
+}
+
+# Table-specific mappings
+_TABLE_FIELD_MAPPINGS = {
+    'contacts': {
+        'first_name': 'NAME',
+        'last_name': 'LAST_NAME',
+        'second_name': 'SECOND_NAME',
+    },
+    'deals': {
+        'amount': 'OPPORTUNITY',
+        'currency': 'CURRENCY_ID',
+    },
+    'tasks': {
+        'title': 'TITLE',
+        'description': 'DESCRIPTION',
+        'deadline': 'DEADLINE',
+        'priority': 'PRIORITY',
+    }
+}
+
+# Merged mappings per table, built once at import
+_MAPPINGS_BY_TABLE = {
+    table_name: {**_COMMON_FIELD_MAPPINGS, **_TABLE_FIELD_MAPPINGS.get(table_name, {})}
+    for table_name in ENTITY_API_MAP
+}
+
+# Internal fields never sent to Bitrix24
+_SKIP_FIELDS = frozenset({'id', 'created_at', 'updated_at', 'synced_at'})
+
+# In-process caches (key -> (expires_at, value)) for rarely changing lookups
+_config_cache: Dict[int, Tuple[datetime, Dict[str, Any]]] = {}
+_columns_cache: Dict[str, Tuple[datetime, List[str]]] = {}
+CONFIG_CACHE_TTL = timedelta(seconds=60)
+METADATA_CACHE_TTL = timedelta(minutes=5)  # Only changes when DDL runs
+
+_Q_TABLE_COLUMNS = text("""
+    SELECT column_name
+    FROM information_schema.columns
+    WHERE table_schema = 'bitrix' AND table_name = :table_name
+    ORDER BY ordinal_position
+""")
+
+def _cache_get(cache: Dict, key: Any) -> Optional[Any]:
+    """Return a cached value if present and not expired"""
+    entry = cache.get(key)
+    if entry and datetime.now() < entry[0]:
+        return entry[1]
+    return None
+
+
+def _cache_set(cache: Dict, key: Any, value: Any, ttl: timedelta) -> None:
+    """Store a value in a cache with the given TTL"""
+    cache[key] = (datetime.now() + ttl, value)
+
+
+def invalidate_sync_config(config_id: int) -> None:
+    """Drop a cached sync config; call after writing its row"""
+    _config_cache.pop(config_id, None)
+
+
+@lru_cache(maxsize=256)
+def _changes_query(table_name: str, columns: Tuple[str, ...]):
+    """
+    Changed-rows query for a syncable table, projected to the given columns
+    
+    table_name is whitelisted against ENTITY_API_MAP and columns come from
+    information_schema, so interpolating them is safe; the same statement
+    object is reused for the same (table, columns) pair.
+    """
+    select_list = ", ".join(f'"{column}"' for column in columns)
+    return text(f"""
+        SELECT {select_list} FROM bitrix.{table_name}
+        WHERE updated_at > :last_sync OR created_at > :last_sync
+        ORDER BY id
+    """)
+
+
+# Tables processed at once per sync; keeps Sheets API calls within per-minute quotas
+SYNC_TABLE_CONCURRENCY = 4
+
+# Configs synced at once by the batch endpoint (each runs its own table concurrency)
+SYNC_CONFIG_CONCURRENCY = 2
+
+# Changed rows fetched per cursor round-trip and written to the sheet per request
+SHEET_WRITE_CHUNK_ROWS = 500
+
+# Bitrix24 batch.json accepts at most 50 commands per request
+BITRIX_BATCH_SIZE = 50
+
+# Stored for rows whose Bitrix24 update failed: matches no real row hash,
+# so the row is diffed again next run against the baseline kept with it
+STALE_ROW_HASH = 0
+
+# Shared Bitrix24 client: keep-alive connections are reused across updates
+# instead of a new TCP/TLS handshake per entity; closed on app shutdown
+_bitrix_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_bitrix_client() -> httpx.AsyncClient:
+    """Return the shared Bitrix24 HTTP client, creating it on first use"""
+    global _bitrix_client
+    if _bitrix_client is None or _bitrix_client.is_closed:
+        _bitrix_client = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+        )
+    return _bitrix_client
+
+
+async def close_bitrix_client():
+    """Close the shared Bitrix24 HTTP client"""
+    global _bitrix_client
+    if _bitrix_client is not None:
+        await _bitrix_client.aclose()
+        _bitrix_client = None
+
 
 @router.post("/configs", response_model=SheetSyncConfigResponse)
 async def create_sync_config(
@@ -75,7 +214,7 @@ async def create_sync_config(
         result = await db.execute(query, {
             "sheet_id": config.sheet_id,
             "sheet_url": config.sheet_url,
-            "tables": json.dumps(config.tables),
+            "tables": orjson.dumps(config.tables).decode(),
             "access_token": config.access_token,
             "refresh_token": config.refresh_token,
             "sync_interval_minutes": config.sync_interval_minutes,
@@ -85,6 +224,7 @@ async def create_sync_config(
         
         row = result.fetchone()
         await db.commit()
+        invalidate_sync_config(row[0])
         
         # Store initial data snapshot for change detection
         await _store_initial_snapshot(db, row[0], config)
@@ -131,7 +271,7 @@ async def list_sync_configs(
         
         configs = []
         for row in rows:
-            tables = json.loads(row[3]) if isinstance(row[3], str) else row[3]
+            tables = orjson.loads(row[3]) if isinstance(row[3], str) else row[3]
             next_sync = None
             if row[6]:  # last_sync_at
                 next_sync = row[6] + timedelta(minutes=row[4])
@@ -172,85 +312,80 @@ async def sync_to_sheet(
         if not config:
             raise HTTPException(status_code=404, detail="Sync config not found")
         
-        sheets_service = GoogleSheetsService(access_token)
-        tables = json.loads(config['tables']) if isinstance(config['tables'], str) else config['tables']
+        started_at = datetime.now()
+        result = await _sync_config_to_sheet(config, access_token)
         
-        total_updated = 0
-        results = []
+        # Update last sync time
+        await _mark_synced(db, {config_id: started_at})
+        await db.commit()
+        invalidate_sync_config(config_id)
         
-        for table_name in tables:
-            # Get changes since last sync
-            last_sync = config['last_sync_at'] or datetime(2020, 1, 1)
-            
-            changes_query = text(f"""
-                SELECT * FROM bitrix.{table_name}
-                WHERE updated_at > :last_sync OR created_at > :last_sync
-                ORDER BY id
-            """)
-            
-            result = await db.execute(changes_query, {"last_sync": last_sync})
-            rows = result.mappings().all()
-            
-            if not rows:
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("sync_to_sheet_error", error=str(e), config_id=config_id)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/configs/sync-to-sheet/batch")
+async def sync_to_sheet_batch(
+    request: SyncToSheetBatchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Sync incremental changes to Google Sheets for several configs at once
+    
+    Configs are synced concurrently; last_sync_at of every config that
+    succeeded is written in one statement and one commit at the end.
+    """
+    try:
+        configs = []
+        errors = []
+        for config_id in dict.fromkeys(request.config_ids):
+            config = await _get_sync_config(db, config_id)
+            if config:
+                configs.append(config)
+            else:
+                errors.append({"config_id": config_id, "error": "Sync config not found"})
+        
+        semaphore = asyncio.Semaphore(SYNC_CONFIG_CONCURRENCY)
+        
+        async def _bounded_sync(config: Dict):
+            async with semaphore:
+                started_at = datetime.now()
+                return started_at, await _sync_config_to_sheet(config, request.access_token)
+        
+        outcomes = await asyncio.gather(*(_bounded_sync(c) for c in configs), return_exceptions=True)
+        
+        results = []
+        synced = {}
+        for config, outcome in zip(configs, outcomes):
+            if isinstance(outcome, BaseException):
+                error = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+                logger.error("sync_to_sheet_error", error=error, config_id=config['id'])
+                errors.append({"config_id": config['id'], "error": error})
                 continue
-            
-            # Get current sheet data to find row positions
-            sheet_data = await sheets_service.get_values(
-                config['sheet_id'],
-                f"{table_name}!A:A"
-            )
-            
-            existing_ids = set()
-            if sheet_data.get('values'):
-                # Skip header, get IDs
-                for i, row in enumerate(sheet_data['values'][1:], start=2):
-                    if row:
-                        existing_ids.add(str(row[0]))
-            
-            # Prepare updates
-            headers = list(rows[0].keys())
-            new_rows = []
-            
-            for row in rows:
-                row_id = str(row.get('id', ''))
-                row_data = [str(row.get(col, '') or '') for col in headers]
-                
-                if row_id not in existing_ids:
-                    new_rows.append(row_data)
-            
-            # Append new rows
-            if new_rows:
-                await sheets_service.append_values(
-                    config['sheet_id'],
-                    f"{table_name}!A1",
-                    new_rows
-                )
-                total_updated += len(new_rows)
-            
-            results.append({
-                "table": table_name,
-                "new_rows": len(new_rows),
-                "total_changes": len(rows)
-            })
+            started_at, result = outcome
+            synced[config['id']] = started_at
+            results.append(result)
         
-        # Update last sync time
-        await db.execute(
-            text("UPDATE bitrix.sheet_sync_configs SET last_sync_at = :now, updated_at = :now WHERE id = :id"),
-            {"now": datetime.now(), "id": config_id}
-        )
+        # Update last sync time of all synced configs at once
+        await _mark_synced(db, synced)
         await db.commit()
-        
-        await sheets_service.close()
+        for config_id in synced:
+            invalidate_sync_config(config_id)
         
         return {
-            "status": "success",
-            "config_id": config_id,
-            "total_updated": total_updated,
-            "details": results
+            "status": "success" if not errors else "completed_with_errors",
+            "total_updated": sum(r["total_updated"] for r in results),
+            "results": results,
+            "errors": errors
         }
         
     except Exception as e:
-        logger.error("sync_to_sheet_error", error=str(e), config_id=config_id)
+        logger.error("sync_to_sheet_batch_error", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -273,93 +408,54 @@ async def sync_from_sheet(
             raise HTTPException(status_code=400, detail="Bidirectional sync not enabled for this config")
         
         sheets_service = GoogleSheetsService(request.access_token)
-        tables = json.loads(config['tables']) if isinstance(config['tables'], str) else config['tables']
+        tables = orjson.loads(config['tables']) if isinstance(config['tables'], str) else config['tables']
         
-        changes_detected = 0
-        changes_synced = 0
-        errors = []
-        details = []
+        # Nothing to scan if the file has not changed since the last clean sync
+        sheet_revision = None
+        try:
+            sheet_revision = await sheets_service.get_file_version(config['sheet_id'])
+        except Exception as e:
+            logger.warning("sheet_revision_unavailable", config_id=config_id, error=str(e))
         
-        for table_name in tables:
-            try:
-                # Read all data from sheet
-                sheet_data = await sheets_service.get_values(
-                    config['sheet_id'],
-                    f"{table_name}!A1:ZZ"
-                )
-                
-                if not sheet_data.get('values') or len(sheet_data['values']) < 2:
-                    continue
-                
-                headers = sheet_data['values'][0]
-                rows = sheet_data['values'][1:]
-                
-                # Get snapshot for comparison
-                snapshot = await _get_snapshot(db, config_id, table_name)
-                
-                # Detect changes
-                table_changes = []
-                for row_idx, row in enumerate(rows):
-                    row_dict = {headers[i]: row[i] if i < len(row) else '' for i in range(len(headers))}
-                    row_id = row_dict.get('id', '')
-                    
-                    if not row_id:
-                        continue
-                    
-                    # Compare with snapshot
-                    old_data = snapshot.get(str(row_id), {})
-                    changed_fields = {}
-                    
-                    for field, value in row_dict.items():
-                        if field == 'id':
-                            continue
-                        old_value = str(old_data.get(field, ''))
-                        new_value = str(value)
-                        if old_value != new_value:
-                            changed_fields[field] = value
-                    
-                    if changed_fields:
-                        table_changes.append({
-                            'row_id': row_id,
-                            'changes': changed_fields
-                        })
-                        changes_detected += 1
-                
-                # Sync changes to Bitrix24
-                for change in table_changes:
-                    try:
-                        success = await _update_bitrix24(
-                            table_name,
-                            change['row_id'],
-                            change['changes']
-                        )
-                        
-                        if success:
-                            changes_synced += 1
-                            details.append({
-                                "table": table_name,
-                                "id": change['row_id'],
-                                "fields": list(change['changes'].keys()),
-                                "status": "synced"
-                            })
-                        else:
-                            errors.append(f"Failed to update {table_name} ID {change['row_id']}")
-                            
-                    except Exception as e:
-                        errors.append(f"Error updating {table_name} ID {change['row_id']}: {str(e)}")
-                
-                # Update snapshot with current data
-                new_snapshot = {}
-                for row in rows:
-                    row_dict = {headers[i]: row[i] if i < len(row) else '' for i in range(len(headers))}
-                    if row_dict.get('id'):
-                        new_snapshot[str(row_dict['id'])] = row_dict
-                
-                await _save_snapshot(db, config_id, table_name, new_snapshot)
-                
-            except Exception as e:
-                errors.append(f"Error processing {table_name}: {str(e)}")
-                logger.error("sync_from_sheet_table_error", table=table_name, error=str(e))
+        if sheet_revision and sheet_revision == config['last_sheet_revision']:
+            await sheets_service.close()
+            return SyncChangesResponse(status="unchanged", changes_detected=0, changes_synced=0)
+        
+        # Tables are independent; each runs on its own session
+        semaphore = asyncio.Semaphore(SYNC_TABLE_CONCURRENCY)
+        
+        async def _bounded_sync(table_name: str):
+            async with semaphore:
+                return await _sync_table_from_sheet(sheets_service, config, table_name)
+        
+        table_results = await asyncio.gather(*(_bounded_sync(t) for t in tables))
+        
+        changes_detected = sum(r["changes_detected"] for r in table_results)
+        changes_synced = sum(r["changes_synced"] for r in table_results)
+        errors = [e for r in table_results for e in r["errors"]]
+        details = [d for r in table_results for d in r["details"]]
+        
+        # Store hashes of changed rows and forget removed rows, all tables in one commit
+        await _save_row_hashes(
+            db,
+            config_id,
+            [entry for r in table_results for entry in r["row_hashes"]],
+            [entry for r in table_results for entry in r["removed_rows"]]
+        )
+        await _drop_legacy_snapshots(
+            db,
+            config_id,
+            [r["legacy_snapshot_table"] for r in table_results if r["legacy_snapshot_table"]]
+        )
+        
+        # Remember the revision only when every change made it to Bitrix24
+        if sheet_revision and not errors:
+            await db.execute(
+                text("UPDATE bitrix.sheet_sync_configs SET last_sheet_revision = :revision WHERE id = :id"),
+                {"revision": sheet_revision, "id": config_id}
+            )
+        await db.commit()
+        invalidate_sync_config(config_id)
         
         await sheets_service.close()
         
@@ -392,6 +488,7 @@ async def delete_sync_config(
             {"now": datetime.now(), "id": config_id}
         )
         await db.commit()
+        invalidate_sync_config(config_id)
         
         return {"status": "deleted", "config_id": config_id}
         
@@ -401,11 +498,93 @@ async def delete_sync_config(
 
 
 # Helper functions
+async def _sync_config_to_sheet(config: Dict, access_token: str) -> Dict[str, Any]:
+    """Write one config's changed rows to its sheet; last_sync_at is left to the caller"""
+    tables = orjson.loads(config['tables']) if isinstance(config['tables'], str) else config['tables']
+    unknown_tables = [t for t in tables if t not in ENTITY_API_MAP]
+    if unknown_tables:
+        raise HTTPException(status_code=400, detail=f"Unsupported tables: {', '.join(unknown_tables)}")
+    
+    sheets_service = GoogleSheetsService(access_token)
+    
+    total_updated = 0
+    results = []
+    last_sync = config['last_sync_at'] or datetime(2020, 1, 1)
+    
+    try:
+        # Header row and ID column of every tab
+        headers, id_index, next_rows = await _get_sheet_layout(sheets_service, config['sheet_id'], tables)
+        
+        # Get changes since last sync, all tables at once, only the columns the tab shows
+        semaphore = asyncio.Semaphore(SYNC_TABLE_CONCURRENCY)
+        
+        async def _bounded_changes(table_name: str):
+            async with semaphore:
+                return await _stream_table_changes(
+                    sheets_service,
+                    config['sheet_id'],
+                    table_name,
+                    headers[table_name],
+                    id_index[table_name],
+                    next_rows[table_name],
+                    last_sync
+                )
+        
+        # Wait for every table before failing, so none still writes through
+        # sheets_service after it is closed below
+        table_changes = await asyncio.gather(
+            *(_bounded_changes(t) for t in tables),
+            return_exceptions=True
+        )
+        for outcome in table_changes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        
+        # Whatever the tables did not flush on their own goes out in one values:batchUpdate
+        data = []
+        for result, pending in table_changes:
+            data.extend(pending)
+            if result["total_changes"]:
+                total_updated += result["new_rows"] + result["updated_rows"]
+                results.append(result)
+        
+        if data:
+            await sheets_service.batch_update_values(config['sheet_id'], data)
+    finally:
+        await sheets_service.close()
+    
+    return {
+        "status": "success",
+        "config_id": config['id'],
+        "total_updated": total_updated,
+        "details": results
+    }
+
+
+async def _mark_synced(db: AsyncSession, synced: Dict[int, datetime]):
+    """Set last_sync_at of several configs in one UPDATE; does not commit"""
+    if not synced:
+        return
+    
+    query = text("""
+        UPDATE bitrix.sheet_sync_configs AS c
+        SET last_sync_at = v.synced_at, updated_at = NOW()
+        FROM unnest(CAST(:ids AS bigint[]), CAST(:synced_at AS timestamp[])) AS v(id, synced_at)
+        WHERE c.id = v.id
+    """)
+    await db.execute(query, {"ids": list(synced), "synced_at": list(synced.values())})
+
+
 async def _get_sync_config(db: AsyncSession, config_id: int) -> Optional[Dict]:
-    """Get sync config by ID"""
+    """Get sync config by ID (cached for CONFIG_CACHE_TTL, dropped on writes)"""
+    config = _cache_get(_config_cache, config_id)
+    if config is not None:
+        return config
+    
     query = text("""
         SELECT id, sheet_id, sheet_url, tables, access_token, refresh_token,
-               sync_interval_minutes, bidirectional, last_sync_at, status
+               sync_interval_minutes, bidirectional, last_sync_at, status,
+               last_sheet_revision
         FROM bitrix.sheet_sync_configs
         WHERE id = :id AND status != 'deleted'
     """)
@@ -415,7 +594,7 @@ async def _get_sync_config(db: AsyncSession, config_id: int) -> Optional[Dict]:
     if not row:
         return None
     
-    return {
+    config = {
         'id': row[0],
         'sheet_id': row[1],
         'sheet_url': row[2],
@@ -425,38 +604,312 @@ async def _get_sync_config(db: AsyncSession, config_id: int) -> Optional[Dict]:
         'sync_interval_minutes': row[6],
         'bidirectional': row[7],
         'last_sync_at': row[8],
-        'status': row[9]
+        'status': row[9],
+        'last_sheet_revision': row[10]
     }
+    _cache_set(_config_cache, config_id, config, CONFIG_CACHE_TTL)
+    return config
 
 
-async def _store_initial_snapshot(db: AsyncSession, config_id: int, config: SheetSyncConfigCreate):
-    """Store initial data snapshot for change detection"""
-    try:
-        sheets_service = GoogleSheetsService(config.access_token)
+async def _get_table_columns(db: AsyncSession, table_name: str) -> List[str]:
+    """Column names of a bitrix table, in table order"""
+    columns = _cache_get(_columns_cache, table_name)
+    if columns is None:
+        result = await db.execute(_Q_TABLE_COLUMNS, {"table_name": table_name})
+        columns = [row[0] for row in result]
+        _cache_set(_columns_cache, table_name, columns, METADATA_CACHE_TTL)
+    return columns
+
+
+async def _stream_table_changes(
+    sheets_service: GoogleSheetsService,
+    sheet_id: str,
+    table_name: str,
+    header: List[str],
+    existing_ids: Dict[str, int],
+    next_row: int,
+    last_sync: datetime
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Stream rows of a table changed since the last sync, on a dedicated session
+    
+    Only the columns named in the tab's header are selected (matched
+    case-insensitively), plus id; a tab without a header gets every column
+    in table order. Changed rows are rewritten in place and new rows go
+    below the last used row. Rows are read through a server-side cursor and
+    written every SHEET_WRITE_CHUNK_ROWS rows; the unflushed remainder is
+    returned as (result, pending ranges) so the caller can send all tables'
+    tails in one values:batchUpdate.
+    """
+    result = {"table": table_name, "new_rows": 0, "updated_rows": 0, "total_changes": 0}
+    data = []
+    new_rows = []
+    pending_rows = 0
+    
+    async with AsyncSessionLocal() as db:
+        table_columns = await _get_table_columns(db, table_name)
+        if header:
+            by_name = {column.lower(): column for column in table_columns}
+            columns = [by_name.get(str(cell).strip().lower()) for cell in header]
+        else:
+            columns = list(table_columns)
         
-        for table_name in config.tables:
-            try:
-                sheet_data = await sheets_service.get_values(
-                    config.sheet_id,
-                    f"{table_name}!A1:ZZ"
-                )
+        selected = tuple(dict.fromkeys(['id', *(column for column in columns if column)]))
+        query = _changes_query(table_name, selected).execution_options(yield_per=SHEET_WRITE_CHUNK_ROWS)
+        rows = await db.stream(query, {"last_sync": last_sync})
+        
+        async for row in rows.mappings():
+            row_id = str(row.get('id', ''))
+            # None leaves a cell untouched in values:batchUpdate, so columns the
+            # table does not have keep whatever users typed into them
+            row_data = [
+                ('' if row[col] is None else str(row[col])) if col else None
+                for col in columns
+            ]
+            
+            row_number = existing_ids.get(row_id)
+            if row_number is None:
+                new_rows.append(row_data)
+                result["new_rows"] += 1
+            else:
+                data.append({"range": f"{table_name}!A{row_number}", "values": [row_data]})
+                result["updated_rows"] += 1
+            result["total_changes"] += 1
+            pending_rows += 1
+            
+            if pending_rows >= SHEET_WRITE_CHUNK_ROWS:
+                if new_rows:
+                    data.append({"range": f"{table_name}!A{next_row}", "values": new_rows})
+                    next_row += len(new_rows)
+                await sheets_service.batch_update_values(sheet_id, data)
+                data, new_rows, pending_rows = [], [], 0
+    
+    if new_rows:
+        data.append({"range": f"{table_name}!A{next_row}", "values": new_rows})
+    return result, data
+
+
+async def _sync_table_from_sheet(
+    sheets_service: GoogleSheetsService,
+    config: Dict,
+    table_name: str
+) -> Dict[str, Any]:
+    """Detect one tab's changes and push them to Bitrix24, reading on a dedicated session"""
+    outcome = {
+        "changes_detected": 0,
+        "changes_synced": 0,
+        "errors": [],
+        "details": [],
+        "row_hashes": [],
+        "removed_rows": [],
+        "legacy_snapshot_table": None
+    }
+    
+    async with AsyncSessionLocal() as db:
+        try:
+            # Read the tab's used range; a bare tab name returns exactly the
+            # populated rows and columns, with no fixed A1:ZZ bound
+            sheet_data = await sheets_service.get_values(config['sheet_id'], table_name)
+            
+            if not sheet_data.get('values') or len(sheet_data['values']) < 2:
+                return outcome
+            
+            headers = tuple(sheet_data['values'][0])
+            width = len(headers)
+            # Rows can only be matched to Bitrix24 entities through an id column
+            rows = sheet_data['values'][1:] if 'id' in headers else []
+            id_position = headers.index('id') if rows else 0
+            
+            # Stored per-row hashes; configs synced before row hashes
+            # existed are compared against their legacy JSON snapshot once
+            stored_hashes = await _get_row_hashes(db, config['id'], table_name)
+            legacy_snapshot = None if stored_hashes else await _get_snapshot(db, config['id'], table_name)
+            
+            # Only rows whose hash moved need a field-level comparison
+            changed_rows = {}
+            seen_ids = set()
+            for row in rows:
+                # Sheets API drops trailing empty cells
+                if len(row) < width:
+                    row = row + [''] * (width - len(row))
+                row_id = row[id_position]
                 
-                if not sheet_data.get('values') or len(sheet_data['values']) < 2:
+                if not row_id:
                     continue
                 
-                headers = sheet_data['values'][0]
-                rows = sheet_data['values'][1:]
-                
-                snapshot = {}
-                for row in rows:
-                    row_dict = {headers[i]: row[i] if i < len(row) else '' for i in range(len(headers))}
-                    if row_dict.get('id'):
-                        snapshot[str(row_dict['id'])] = row_dict
+                row_id = str(row_id)
+                seen_ids.add(row_id)
+                row_hash = _row_hash(headers, row)
+                if stored_hashes.get(row_id) != row_hash:
+                    # Unchanged rows never get a dict
+                    changed_rows[row_id] = (row_hash, dict(zip(headers, row)))
+            
+            if legacy_snapshot is not None:
+                old_rows = legacy_snapshot
+                # Row hashes replace the snapshot from now on
+                if legacy_snapshot:
+                    outcome["legacy_snapshot_table"] = table_name
+            else:
+                old_rows = await _get_row_data(db, config['id'], table_name, list(changed_rows))
+            
+            # Detect changes
+            table_changes = []
+            for row_id, (_, row_dict) in changed_rows.items():
+                # Compare with last seen values
+                old_data = old_rows.get(row_id, {})
+                changed_fields = {}
                 
-                await _save_snapshot(db, config_id, table_name, snapshot)
+                for field, value in row_dict.items():
+                    if field == 'id':
+                        continue
+                    old_value = str(old_data.get(field, ''))
+                    new_value = str(value)
+                    if old_value != new_value:
+                        changed_fields[field] = value
                 
-            except Exception as e:
-                logger.warning("initial_snapshot_table_error", table=table_name, error=str(e))
+                if changed_fields:
+                    table_changes.append({
+                        'row_id': row_id,
+                        'changes': changed_fields
+                    })
+                    outcome["changes_detected"] += 1
+            
+            # Sync changes to Bitrix24, up to BITRIX_BATCH_SIZE updates per request
+            results = await _update_bitrix24_batch(
+                table_name,
+                [(change['row_id'], change['changes']) for change in table_changes]
+            )
+            
+            failed_ids = set()
+            for change, error in zip(table_changes, results):
+                if error is None:
+                    outcome["changes_synced"] += 1
+                    outcome["details"].append({
+                        "table": table_name,
+                        "id": change['row_id'],
+                        "fields": list(change['changes'].keys()),
+                        "status": "synced"
+                    })
+                else:
+                    failed_ids.add(change['row_id'])
+                    outcome["errors"].append(f"Failed to update {table_name} ID {change['row_id']}: {error}")
+            
+            # Hashes of synced rows and rows removed from the sheet; the
+            # caller writes them for all tables in one transaction. Failed
+            # rows keep their previous values as baseline under STALE_ROW_HASH
+            # so the next run diffs and re-sends only their changed fields
+            outcome["row_hashes"] = [
+                (table_name, row_id, row_hash, row_dict)
+                if row_id not in failed_ids
+                else (table_name, row_id, STALE_ROW_HASH, old_rows.get(row_id, {}))
+                for row_id, (row_hash, row_dict) in changed_rows.items()
+            ]
+            outcome["removed_rows"] = [
+                (table_name, row_id) for row_id in stored_hashes if row_id not in seen_ids
+            ]
+        
+        except Exception as e:
+            outcome["errors"].append(f"Error processing {table_name}: {str(e)}")
+            logger.error("sync_from_sheet_table_error", table=table_name, error=str(e))
+    
+    return outcome
+
+
+async def _get_sheet_layout(
+    sheets_service: GoogleSheetsService,
+    sheet_id: str,
+    tables: List[str]
+) -> Tuple[Dict[str, List[str]], Dict[str, Dict[str, int]], Dict[str, int]]:
+    """
+    Read the header row and ID column of several tabs
+    
+    Returns (headers, id_index, next_rows): per tab, the header cells, row
+    ID -> sheet row number, and the first row number below the used range.
+    Column A is read with the headers; tabs whose 'id' header sits elsewhere
+    get their ID column in one follow-up batchGet.
+    """
+    ranges = []
+    for table_name in tables:
+        ranges.extend((f"{table_name}!1:1", f"{table_name}!A:A"))
+    value_ranges = await sheets_service.batch_get_values(sheet_id, ranges)
+    
+    headers = {}
+    columns = {}
+    moved = {}
+    for i, table_name in enumerate(tables):
+        header_values = value_ranges[2 * i].get('values', [])
+        headers[table_name] = header_values[0] if header_values else []
+        columns[table_name] = value_ranges[2 * i + 1].get('values', [])
+        # Without a header, IDs are assumed to be in column A
+        if 'id' in headers[table_name] and headers[table_name].index('id') > 0:
+            moved[table_name] = _column_letter(headers[table_name].index('id'))
+    
+    if moved:
+        id_ranges = await sheets_service.batch_get_values(
+            sheet_id,
+            [f"{table_name}!{letter}:{letter}" for table_name, letter in moved.items()]
+        )
+        for table_name, value_range in zip(moved, id_ranges):
+            column_a_rows = len(columns[table_name])
+            columns[table_name] = value_range.get('values', [])
+            # Rows below the ID column may still hold data in column A
+            columns[table_name].extend([[]] * (column_a_rows - len(columns[table_name])))
+    
+    id_index = {}
+    next_rows = {}
+    for table_name in tables:
+        values = columns[table_name]
+        # Skip header; data starts on sheet row 2
+        id_index[table_name] = {
+            str(row[0]): row_number
+            for row_number, row in enumerate(values[1:], start=2)
+            if row
+        }
+        next_rows[table_name] = max(len(values) + 1, 2)
+    return headers, id_index, next_rows
+
+
+def _column_letter(index: int) -> str:
+    """Convert 0-indexed column to letter (0=A, 1=B, 26=AA, etc.)"""
+    result = ""
+    while index >= 0:
+        result = chr(index % 26 + ord('A')) + result
+        index = index // 26 - 1
+    return result
+
+
+async def _store_initial_snapshot(db: AsyncSession, config_id: int, config: SheetSyncConfigCreate):
+    """Store initial data snapshot for change detection"""
+    try:
+        sheets_service = GoogleSheetsService(config.access_token)
+        
+        # All tabs in one read, all row hashes in one upsert
+        value_ranges = await sheets_service.batch_get_values(
+            config.sheet_id,
+            list(config.tables)
+        )
+        
+        entries = []
+        for table_name, value_range in zip(config.tables, value_ranges):
+            values = value_range.get('values', [])
+            if len(values) < 2:
+                continue
+            
+            headers = tuple(values[0])
+            if 'id' not in headers:
+                continue
+            
+            width = len(headers)
+            id_position = headers.index('id')
+            for row in values[1:]:
+                if len(row) < width:
+                    row = row + [''] * (width - len(row))
+                if row[id_position]:
+                    entries.append((table_name, str(row[id_position]), _row_hash(headers, row), dict(zip(headers, row))))
+        
+        if entries:
+            await _upsert_row_hashes(db, config_id, entries)
+            await db.commit()
         
         await sheets_service.close()
         
@@ -465,7 +918,7 @@ async def _store_initial_snapshot(db: AsyncSession, config_id: int, config: Shee
 
 
 async def _get_snapshot(db: AsyncSession, config_id: int, table_name: str) -> Dict:
-    """Get stored snapshot for a table"""
+    """Get the legacy JSON snapshot for a table (configs synced before row hashes)"""
     query = text("""
         SELECT snapshot_data
         FROM bitrix.sheet_sync_snapshots
@@ -475,126 +928,193 @@ async def _get_snapshot(db: AsyncSession, config_id: int, table_name: str) -> Di
     row = result.fetchone()
     
     if row and row[0]:
-        return json.loads(row[0]) if isinstance(row[0], str) else row[0]
+        return orjson.loads(row[0]) if isinstance(row[0], str) else row[0]
     return {}
 
 
-async def _save_snapshot(db: AsyncSession, config_id: int, table_name: str, snapshot: Dict):
-    """Save snapshot for a table"""
+async def _drop_legacy_snapshots(db: AsyncSession, config_id: int, table_names: List[str]):
+    """Delete legacy JSON snapshots of tables now tracked by row hashes; does not commit"""
+    if not table_names:
+        return
+    await db.execute(
+        text("""
+            DELETE FROM bitrix.sheet_sync_snapshots
+            WHERE config_id = :config_id AND table_name = ANY(:table_names)
+        """),
+        {"config_id": config_id, "table_names": table_names}
+    )
+
+
+def _row_hash(headers: Sequence[str], values: Iterable[Any]) -> int:
+    """64-bit content hash of a sheet row (header/value pairs), as a signed BIGINT"""
+    content = "\x1f".join(f"{field}\x1e{value}" for field, value in zip(headers, values))
+    digest = hashlib.blake2b(content.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+async def _get_row_hashes(db: AsyncSession, config_id: int, table_name: str) -> Dict[str, int]:
+    """Get stored row hashes for a table, keyed by row ID"""
     query = text("""
-        INSERT INTO bitrix.sheet_sync_snapshots (config_id, table_name, snapshot_data, updated_at)
-        VALUES (:config_id, :table_name, :snapshot_data, :updated_at)
-        ON CONFLICT (config_id, table_name) 
-        DO UPDATE SET snapshot_data = :snapshot_data, updated_at = :updated_at
+        SELECT row_id, row_hash
+        FROM bitrix.sheet_sync_row_hashes
+        WHERE config_id = :config_id AND table_name = :table_name
+    """)
+    result = await db.execute(query, {"config_id": config_id, "table_name": table_name})
+    return {row[0]: row[1] for row in result.fetchall()}
+
+
+async def _get_row_data(db: AsyncSession, config_id: int, table_name: str, row_ids: List[str]) -> Dict[str, Dict]:
+    """Get last seen values of specific rows"""
+    if not row_ids:
+        return {}
+    query = text("""
+        SELECT row_id, row_data
+        FROM bitrix.sheet_sync_row_hashes
+        WHERE config_id = :config_id AND table_name = :table_name AND row_id = ANY(:row_ids)
+    """)
+    result = await db.execute(query, {"config_id": config_id, "table_name": table_name, "row_ids": row_ids})
+    return {row[0]: row[1] for row in result.fetchall()}
+
+
+async def _upsert_row_hashes(
+    db: AsyncSession,
+    config_id: int,
+    entries: List[Tuple[str, str, int, Dict[str, Any]]]
+):
+    """Upsert (table, row ID, hash, values) entries in one statement; does not commit"""
+    query = text("""
+        INSERT INTO bitrix.sheet_sync_row_hashes (config_id, table_name, row_id, row_hash, row_data, updated_at)
+        SELECT :config_id, t.table_name, t.row_id, t.row_hash, t.row_data, NOW()
+        FROM unnest(
+            CAST(:table_names AS varchar[]),
+            CAST(:row_ids AS varchar[]),
+            CAST(:row_hashes AS bigint[]),
+            CAST(:row_datas AS jsonb[])
+        ) AS t(table_name, row_id, row_hash, row_data)
+        ON CONFLICT (config_id, table_name, row_id)
+        DO UPDATE SET row_hash = EXCLUDED.row_hash, row_data = EXCLUDED.row_data, updated_at = EXCLUDED.updated_at
     """)
-    
     await db.execute(query, {
         "config_id": config_id,
-        "table_name": table_name,
-        "snapshot_data": json.dumps(snapshot),
-        "updated_at": datetime.now()
+        "table_names": [entry[0] for entry in entries],
+        "row_ids": [entry[1] for entry in entries],
+        "row_hashes": [entry[2] for entry in entries],
+        "row_datas": [orjson.dumps(entry[3]).decode() for entry in entries]
     })
-    await db.commit()
 
 
-async def _update_bitrix24(table_name: str, entity_id: str, fields: Dict[str, Any]) -> bool:
-    """Update entity in Bitrix24"""
-    import httpx
+async def _save_row_hashes(
+    db: AsyncSession,
+    config_id: int,
+    entries: List[Tuple[str, str, int, Dict[str, Any]]],
+    removed_rows: List[Tuple[str, str]]
+):
+    """Upsert (hash, values) for changed rows and drop removed (table, row ID) pairs; does not commit"""
+    if entries:
+        await _upsert_row_hashes(db, config_id, entries)
+    
+    if removed_rows:
+        await db.execute(
+            text("""
+                DELETE FROM bitrix.sheet_sync_row_hashes AS h
+                USING unnest(CAST(:table_names AS varchar[]), CAST(:row_ids AS varchar[])) AS r(table_name, row_id)
+                WHERE h.config_id = :config_id AND h.table_name = r.table_name AND h.row_id = r.row_id
+            """),
+            {
+                "config_id": config_id,
+                "table_names": [table_name for table_name, _ in removed_rows],
+                "row_ids": [row_id for _, row_id in removed_rows]
+            }
+        )
+
+
+async def _update_bitrix24_batch(
+    table_name: str,
+    updates: List[Tuple[str, Dict[str, Any]]]
+) -> List[Optional[str]]:
+    """
+    Update entities in Bitrix24 through batch.json
+    
+    Sends up to BITRIX_BATCH_SIZE update commands per request. Returns one
+    entry per update, in order: None on success, otherwise the error message.
+    """
+    if not updates:
+        return []
     
     # Get Bitrix24 webhook URL from environment
     webhook_url = os.getenv('BITRIX_WEBHOOK_URL', '')
     
     if not webhook_url:
         logger.error("bitrix_webhook_url_not_configured")
-        return False
+        return ["Bitrix24 webhook URL not configured"] * len(updates)
     
     api_config = ENTITY_API_MAP.get(table_name)
     if not api_config:
         logger.warning("unsupported_entity_type", table=table_name)
-        return False
+        return [f"Unsupported entity type {table_name}"] * len(updates)
     
-    # Map field names back to Bitrix24 format
-    bitrix_fields = _map_fields_to_bitrix(table_name, fields)
+    url = f"{webhook_url}/batch.json"
+    results: List[Optional[str]] = []
     
-    try:
-        url = f"{webhook_url}/{api_config['method']}"
-        payload = {
-            "id": entity_id,
-            "fields": bitrix_fields
-        }
+    for start in range(0, len(updates), BITRIX_BATCH_SIZE):
+        chunk = updates[start:start + BITRIX_BATCH_SIZE]
+        
+        # Each command is "<method>?<query>" with fields mapped back to Bitrix24 format
+        cmd = {}
+        for i, (entity_id, fields) in enumerate(chunk):
+            params = {"id": entity_id}
+            for bitrix_field, value in _map_fields_to_bitrix(table_name, fields).items():
+                params[f"fields[{bitrix_field}]"] = "" if value is None else value
+            cmd[f"c{i}"] = f"{api_config['method']}?{urlencode(params)}"
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, timeout=30)
+        try:
+            response = await _get_bitrix_client().post(url, json={"halt": 0, "cmd": cmd})
             
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('result'):
-                    logger.info("bitrix_update_success", 
-                              table=table_name, 
-                              id=entity_id,
-                              fields=list(fields.keys()))
-                    return True
+            if response.status_code != 200:
+                logger.warning("bitrix_batch_update_failed",
+                              table=table_name,
+                              status=response.status_code,
+                              response=response.text[:200])
+                results.extend([f"HTTP {response.status_code}"] * len(chunk))
+                continue
             
-            logger.warning("bitrix_update_failed",
-                          table=table_name,
-                          id=entity_id,
-                          status=response.status_code,
-                          response=response.text[:200])
-            return False
+            # Bitrix24 returns [] instead of {} when no command succeeded/failed
+            batch = response.json().get('result') or {}
+            succeeded = batch.get('result') or {}
+            failed = batch.get('result_error') or {}
+            if not isinstance(succeeded, dict):
+                succeeded = {}
+            if not isinstance(failed, dict):
+                failed = {}
             
-    except Exception as e:
-        logger.error("bitrix_update_error", table=table_name, id=entity_id, error=str(e))
-        return False
+            for i, (entity_id, _) in enumerate(chunk):
+                key = f"c{i}"
+                if succeeded.get(key):
+                    results.append(None)
+                    continue
+                
+                error = failed.get(key)
+                message = error.get('error_description', str(error)) if isinstance(error, dict) else str(error or "empty result")
+                logger.warning("bitrix_update_failed", table=table_name, id=entity_id, error=message)
+                results.append(message)
+            
+            logger.info("bitrix_batch_update_success",
+                       table=table_name,
+                       commands=len(chunk),
+                       failed=len(failed))
+            
+        except Exception as e:
+            logger.error("bitrix_batch_update_error", table=table_name, error=str(e))
+            results.extend([str(e)] * len(chunk))
+    
+    return results
 
 
 def _map_fields_to_bitrix(table_name: str, fields: Dict[str, Any]) -> Dict[str, Any]:
     """Map local field names to Bitrix24 field names"""
-    # Common field mappings (lowercase to Bitrix format)
-    common_mappings = {
-        'name': 'NAME',
-        'title': 'TITLE',
-        'phone': 'PHONE',
-        'email': 'EMAIL',
-        'company_id': 'COMPANY_ID',
-        'contact_id': 'CONTACT_ID',
-        'assigned_by_id': 'ASSIGNED_BY_ID',
-        'responsible_id': 'RESPONSIBLE_ID',
-        'status_id': 'STATUS_ID',
-        'stage_id': 'STAGE_ID',
-        'opportunity': 'OPPORTUNITY',
-        'comments': 'COMMENTS',
-        'source_id': 'SOURCE_ID',
-        'source_description': 'SOURCE_DESCRIPTION',
-    }
-    
-    # Table-specific mappings
-    table_mappings = {
-        'contacts': {
-            'first_name': 'NAME',
-            'last_name': 'LAST_NAME',
-            'second_name': 'SECOND_NAME',
-        },
-        'deals': {
-            'amount': 'OPPORTUNITY',
-            'currency': 'CURRENCY_ID',
-        },
-        'tasks': {
-            'title': 'TITLE',
-            'description': 'DESCRIPTION',
-            'deadline': 'DEADLINE',
-            'priority': 'PRIORITY',
-        }
+    mappings = _MAPPINGS_BY_TABLE.get(table_name, _COMMON_FIELD_MAPPINGS)
+    return {
+        mappings.get(field, field.upper()): value
+        for field, value in fields.items()
+        if field not in _SKIP_FIELDS
     }
-    
-    result = {}
-    mappings = {**common_mappings, **table_mappings.get(table_name, {})}
-    
-    for field, value in fields.items():
-        # Skip internal fields
-        if field in ('id', 'created_at', 'updated_at', 'synced_at'):
-            continue
-        
-        bitrix_field = mappings.get(field, field.upper())
-        result[bitrix_field] = value
-    
-    return result
@@ -5,12 +5,13 @@ Provides comprehensive view of all customer interactions
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import Optional, List, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta
+import asyncio
 import structlog
 
-from app.database import get_db
+from app.database import get_db, ReadOnlySessionLocal
 
 router = APIRouter()
 logger = structlog.get_logger()
@@ -43,6 +44,15 @@ ACTIVITY_TYPE_NAMES = {
     "6": "Randevu",
 }
 
+# In-process caches (key -> (expires_at, value)) for user and stage names;
+# both only change when the Bitrix24 sync runs
+_lookup_cache: Dict[str, Tuple[datetime, Dict]] = {}
+_lookup_locks = {"users": asyncio.Lock(), "stages": asyncio.Lock()}
+LOOKUP_CACHE_TTL = timedelta(seconds=60)
+
+# Search matches counted for list totals; larger results report the cap
+LIST_COUNT_CAP = 1000
+
 
 class CustomerSearchResult(BaseModel):
     id: int
@@ -118,54 +128,46 @@ async def search_customers(
     
     search_term = f"%{q}%"
     
-    # Search contacts
-    contacts_query = text("""
-        SELECT 
-            id,
-            bitrix_id,
-            'contact' as entity_type,
-            COALESCE(full_name, CONCAT_WS(' ', name, last_name)) as name,
-            phone,
-            email
-        FROM bitrix.contacts
-        WHERE 
-            full_name ILIKE :search
-            OR name ILIKE :search
-            OR last_name ILIKE :search
-            OR phone ILIKE :search
-            OR email ILIKE :search
-        LIMIT :limit
-    """)
-    
-    # Search companies
-    companies_query = text("""
-        SELECT 
-            id,
-            bitrix_id,
-            'company' as entity_type,
-            title as name,
-            phone,
-            email
-        FROM bitrix.companies
-        WHERE 
-            title ILIKE :search
-            OR phone ILIKE :search
-            OR email ILIKE :search
+    # Contacts first, then companies, in one round trip
+    query = text("""
+        (
+            SELECT 
+                id,
+                bitrix_id,
+                'contact' as entity_type,
+                COALESCE(full_name, CONCAT_WS(' ', name, last_name)) as name,
+                phone,
+                email
+            FROM bitrix.contacts
+            WHERE 
+                full_name ILIKE :search
+                OR name ILIKE :search
+                OR last_name ILIKE :search
+                OR phone ILIKE :search
+                OR email ILIKE :search
+            LIMIT :limit
+        )
+        UNION ALL
+        (
+            SELECT 
+                id,
+                bitrix_id,
+                'company' as entity_type,
+                title as name,
+                phone,
+                email
+            FROM bitrix.companies
+            WHERE 
+                title ILIKE :search
+                OR phone ILIKE :search
+                OR email ILIKE :search
+            LIMIT :limit
+        )
         LIMIT :limit
     """)
     
-    results = []
-    
-    # Execute both queries
-    contacts_result = await db.execute(contacts_query, {"search": search_term, "limit": limit})
-    for row in contacts_result.mappings():
-        results.append(CustomerSearchResult(**dict(row)))
-    
-    companies_result = await db.execute(companies_query, {"search": search_term, "limit": limit})
-    for row in companies_result.mappings():
-        results.append(CustomerSearchResult(**dict(row)))
-    
-    return results[:limit]
+    result = await db.execute(query, {"search": search_term, "limit": limit})
+    return [CustomerSearchResult(**dict(row)) for row in result.mappings()]
 
 
 @router.get("/list/contacts")
@@ -173,27 +175,38 @@ async def list_contacts(
     limit: int = Query(50, ge=1, le=500),
     offset: int = Query(0, ge=0),
     search: Optional[str] = Query(None, description="Optional search filter"),
+    cursor_name: Optional[str] = Query(None, description="Keyset cursor: full_name of the last row seen (omit when it was empty)"),
+    cursor_id: Optional[int] = Query(None, description="Keyset cursor: id of the last row seen"),
     db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
-    """List contacts with pagination"""
+    """
+    List contacts with pagination
     
-    where_clause = ""
+    Pass next_cursor's cursor_name/cursor_id back to fetch the following
+    page by keyset (offset is then ignored); offset paging still works.
+    """
+    
+    search_conditions = []
     params = {"limit": limit, "offset": offset}
     
     if search:
-        where_clause = """
-            WHERE full_name ILIKE :search
+        search_conditions.append("""(
+            full_name ILIKE :search
             OR name ILIKE :search
             OR last_name ILIKE :search
             OR phone ILIKE :search
             OR email ILIKE :search
-        """
+        )""")
         params["search"] = f"%{search}%"
     
-    # Get total count
-    count_query = text(f"SELECT COUNT(*) FROM bitrix.contacts {where_clause}")
-    count_result = await db.execute(count_query, params)
-    total = count_result.scalar()
+    # Get total count (estimated or capped, see _list_total)
+    where_clause = _where(search_conditions)
+    total, total_is_estimate = await _list_total(db, "contacts", where_clause, params)
+    
+    conditions = list(search_conditions)
+    if cursor_id is not None:
+        conditions.append(_keyset_condition("full_name", cursor_name))
+        params.update(cursor_name=cursor_name, cursor_id=cursor_id, offset=0)
     
     # Get data
     query = text(f"""
@@ -202,24 +215,19 @@ async def list_contacts(
             bitrix_id,
             'contact' as entity_type,
             COALESCE(full_name, CONCAT_WS(' ', name, last_name)) as name,
+            full_name as sort_name,
             phone,
             email,
             company_title
         FROM bitrix.contacts
-        {where_clause}
-        ORDER BY full_name ASC NULLS LAST
+        {_where(conditions)}
+        ORDER BY full_name ASC NULLS LAST, id ASC
         LIMIT :limit OFFSET :offset
     """)
     
-    result = await db.execute(query, params)
-    items = [CustomerSearchResult(**dict(row)) for row in result.mappings()]
-    
-    return {
-        "items": items,
-        "total": total,
-        "limit": limit,
-        "offset": offset
-    }
+    # One extra row tells whether another page exists
+    result = await db.execute(query, {**params, "limit": limit + 1})
+    return _list_page(result.mappings().all(), total, total_is_estimate, limit, offset)
 
 
 @router.get("/list/companies")
@@ -227,25 +235,36 @@ async def list_companies(
     limit: int = Query(50, ge=1, le=500),
     offset: int = Query(0, ge=0),
     search: Optional[str] = Query(None, description="Optional search filter"),
+    cursor_name: Optional[str] = Query(None, description="Keyset cursor: title of the last row seen (omit when it was empty)"),
+    cursor_id: Optional[int] = Query(None, description="Keyset cursor: id of the last row seen"),
     db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
-    """List companies with pagination"""
+    """
+    List companies with pagination
     
-    where_clause = ""
+    Pass next_cursor's cursor_name/cursor_id back to fetch the following
+    page by keyset (offset is then ignored); offset paging still works.
+    """
+    
+    search_conditions = []
     params = {"limit": limit, "offset": offset}
     
     if search:
-        where_clause = """
-            WHERE title ILIKE :search
+        search_conditions.append("""(
+            title ILIKE :search
             OR phone ILIKE :search
             OR email ILIKE :search
-        """
+        )""")
         params["search"] = f"%{search}%"
     
-    # Get total count
-    count_query = text(f"SELECT COUNT(*) FROM bitrix.companies {where_clause}")
-    count_result = await db.execute(count_query, params)
-    total = count_result.scalar()
+    # Get total count (estimated or capped, see _list_total)
+    where_clause = _where(search_conditions)
+    total, total_is_estimate = await _list_total(db, "companies", where_clause, params)
+    
+    conditions = list(search_conditions)
+    if cursor_id is not None:
+        conditions.append(_keyset_condition("title", cursor_name))
+        params.update(cursor_name=cursor_name, cursor_id=cursor_id, offset=0)
     
     # Get data
     query = text(f"""
@@ -254,25 +273,96 @@ async def list_companies(
             bitrix_id,
             'company' as entity_type,
             title as name,
+            title as sort_name,
             phone,
             email
         FROM bitrix.companies
-        {where_clause}
-        ORDER BY title ASC NULLS LAST
+        {_where(conditions)}
+        ORDER BY title ASC NULLS LAST, id ASC
         LIMIT :limit OFFSET :offset
     """)
     
-    result = await db.execute(query, params)
-    items = [CustomerSearchResult(**dict(row)) for row in result.mappings()]
+    # One extra row tells whether another page exists
+    result = await db.execute(query, {**params, "limit": limit + 1})
+    return _list_page(result.mappings().all(), total, total_is_estimate, limit, offset)
+
+
+def _where(conditions: List[str]) -> str:
+    """WHERE clause from AND-ed conditions, empty when there are none"""
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _keyset_condition(sort_column: str, cursor_name: Optional[str]) -> str:
+    """
+    Rows after (:cursor_name, :cursor_id) in ORDER BY sort_column ASC NULLS LAST, id ASC
+    
+    Rows with a NULL sort value come last, so a cursor inside that tail
+    (cursor_name omitted) only moves on by id.
+    """
+    if cursor_name is None:
+        return f"({sort_column} IS NULL AND id > :cursor_id)"
+    return f"(({sort_column}, id) > (:cursor_name, :cursor_id) OR {sort_column} IS NULL)"
+
+
+def _list_page(
+    rows: List[Any],
+    total: int,
+    total_is_estimate: bool,
+    limit: int,
+    offset: int
+) -> Dict[str, Any]:
+    """List response from limit+1 fetched rows, with the keyset cursor of the last row"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    next_cursor = None
+    if has_more:
+        next_cursor = {"cursor_name": rows[-1]["sort_name"], "cursor_id": rows[-1]["id"]}
     
     return {
-        "items": items,
+        "items": [CustomerSearchResult(**dict(row)) for row in rows],
         "total": total,
+        "total_is_estimate": total_is_estimate,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
         "limit": limit,
         "offset": offset
     }
 
 
+async def _list_total(
+    db: AsyncSession,
+    table_name: str,
+    where_clause: str,
+    params: Dict[str, Any]
+) -> Tuple[int, bool]:
+    """
+    Row count for a list page header, without a full count scan
+    
+    Unfiltered lists use the planner's row estimate from pg_class; searches
+    count at most LIST_COUNT_CAP matches. Returns (total, is_estimate).
+    """
+    if not where_clause:
+        result = await db.execute(
+            text(f"SELECT reltuples::bigint FROM pg_class WHERE oid = 'bitrix.{table_name}'::regclass")
+        )
+        estimate = result.scalar()
+        # -1 / 0 until the table has been analyzed; small tables count exactly
+        if estimate and estimate > 0:
+            return estimate, True
+        result = await db.execute(text(f"SELECT COUNT(*) FROM bitrix.{table_name}"))
+        return result.scalar(), False
+    
+    count_query = text(f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM bitrix.{table_name} {where_clause} LIMIT :count_cap
+        ) capped
+    """)
+    result = await db.execute(count_query, {**params, "count_cap": LIST_COUNT_CAP})
+    total = result.scalar()
+    return total, total >= LIST_COUNT_CAP
+
+
 @router.get("/contact/{bitrix_id}")
 async def get_contact_360(
     bitrix_id: str,
@@ -298,32 +388,30 @@ async def _get_customer_360(
 ) -> Customer360Response:
     """Internal function to get 360° view"""
     
-    # Get user name lookup
-    users_cache = await _get_users_cache(db)
+    # Independent lookups run at once, each on its own session (asyncpg
+    # allows one query per connection); only task comments wait for tasks
     
-    # Get stage name lookup
-    stages_cache = await _get_stages_cache(db)
+    # Get user and stage name lookups
+    users_cache, stages_cache = await asyncio.gather(
+        _cached_lookup("users", _get_users_cache),
+        _cached_lookup("stages", _get_stages_cache),
+    )
     
-    # Get customer info
-    if entity_type == "contact":
-        customer = await _get_contact_info(db, bitrix_id, users_cache)
-    else:
-        customer = await _get_company_info(db, bitrix_id, users_cache)
+    # Get customer info, related deals, activities and tasks
+    get_info = _get_contact_info if entity_type == "contact" else _get_company_info
+    customer, deals, activities, tasks = await asyncio.gather(
+        _on_own_session(get_info, bitrix_id, users_cache),
+        _on_own_session(_get_related_deals, entity_type, bitrix_id, users_cache, stages_cache),
+        _on_own_session(_get_related_activities, entity_type, bitrix_id, users_cache),
+        _on_own_session(_get_related_tasks, entity_type, bitrix_id, users_cache),
+    )
     
     if not customer:
         raise HTTPException(status_code=404, detail=f"{entity_type.capitalize()} not found")
     
-    # Get related deals
-    deals = await _get_related_deals(db, entity_type, bitrix_id, users_cache, stages_cache)
-    
-    # Get related activities
-    activities = await _get_related_activities(db, entity_type, bitrix_id, users_cache)
-    
-    # Get related tasks (through deals or direct assignment)
-    tasks = await _get_related_tasks(db, entity_type, bitrix_id, users_cache)
-    
-    # Get task comments
-    task_comments = await _get_task_comments(db, [t["bitrix_id"] for t in tasks], users_cache)
+    # Get task comments (titles come from the tasks already loaded)
+    task_titles = {str(t["bitrix_id"]): t["title"] for t in tasks}
+    task_comments = await _get_task_comments(db, task_titles, users_cache)
     
     # Build timeline
     timeline = _build_timeline(deals, tasks, activities, task_comments)
@@ -342,6 +430,33 @@ async def _get_customer_360(
     )
 
 
+async def _on_own_session(fetch: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+    """Run one lookup on a dedicated read-only session so it can overlap with others"""
+    async with ReadOnlySessionLocal() as session:
+        return await fetch(session, *args)
+
+
+async def _cached_lookup(key: str, fetch: Callable[[AsyncSession], Awaitable[Dict]]) -> Dict:
+    """
+    Return a lookup dict from the in-process cache, loading it on a miss
+    
+    The per-key lock lets one request refill an expired entry while
+    concurrent requests wait for it instead of running the same query.
+    """
+    entry = _lookup_cache.get(key)
+    if entry and datetime.now() < entry[0]:
+        return entry[1]
+    
+    async with _lookup_locks[key]:
+        entry = _lookup_cache.get(key)
+        if entry and datetime.now() < entry[0]:
+            return entry[1]
+        
+        value = await _on_own_session(fetch)
+        _lookup_cache[key] = (datetime.now() + LOOKUP_CACHE_TTL, value)
+        return value
+
+
 async def _get_users_cache(db: AsyncSession) -> Dict[str, str]:
     """Get user ID to name mapping"""
     query = text("""
@@ -552,15 +667,18 @@ async def _get_related_tasks(
 ) -> List[Dict]:
     """Get tasks related to contact or company via deals or CRM binding"""
     
-    # Get task IDs from deals
+    # Bitrix24 binds tasks to CRM items in UF_CRM_TASK as prefixed refs
+    # ("C_12", "CO_7", "D_345"): match the customer itself and its deals
     if entity_type == "contact":
+        customer_ref = f"C_{bitrix_id}"
         where_clause = "d.contact_id = :bitrix_id"
     else:
+        customer_ref = f"CO_{bitrix_id}"
         where_clause = "d.company_id = :bitrix_id"
     
-    # Search in task title/description for CRM reference or via UF_CRM_TASK field
+    # ?| is served by the GIN index on original_data->'UF_CRM_TASK' (026)
     query = text(f"""
-        SELECT DISTINCT
+        SELECT 
             t.bitrix_id,
             t.title,
             t.status,
@@ -572,15 +690,15 @@ async def _get_related_tasks(
             t.created_date,
             t.comments_count
         FROM bitrix.tasks t
-        WHERE 
-            t.title ILIKE '%CRM%' AND (
-                t.original_data::text ILIKE '%' || :bitrix_id || '%'
-            )
+        WHERE t.original_data->'UF_CRM_TASK' ?| (
+            ARRAY[CAST(:customer_ref AS text)]
+            || ARRAY(SELECT 'D_' || d.bitrix_id FROM bitrix.deals d WHERE {where_clause})
+        )
         ORDER BY t.created_date DESC
         LIMIT 100
     """)
     
-    result = await db.execute(query, {"bitrix_id": bitrix_id})
+    result = await db.execute(query, {"bitrix_id": bitrix_id, "customer_ref": customer_ref})
     tasks = []
     
     for row in result.mappings():
@@ -602,12 +720,12 @@ async def _get_related_tasks(
 
 async def _get_task_comments(
     db: AsyncSession,
-    task_ids: List[str],
+    task_titles: Dict[str, str],
     users_cache: Dict
 ) -> List[Dict]:
-    """Get comments for tasks"""
+    """Get comments for tasks, keyed by task bitrix_id -> title"""
     
-    if not task_ids:
+    if not task_titles:
         return []
     
     query = text("""
@@ -617,23 +735,21 @@ async def _get_task_comments(
             tc.data->>'POST_MESSAGE' as message,
             tc.data->>'POST_MESSAGE_HTML' as message_html,
             tc.data->>'AUTHOR_ID' as author_id,
-            tc.data->>'POST_DATE' as post_date,
-            t.title as task_title
+            tc.data->>'POST_DATE' as post_date
         FROM bitrix.task_comments tc
-        JOIN bitrix.tasks t ON t.bitrix_id = tc.task_id::text
         WHERE tc.task_id::text = ANY(:task_ids)
         ORDER BY tc.data->>'POST_DATE' DESC
         LIMIT 50
     """)
     
-    result = await db.execute(query, {"task_ids": task_ids})
+    result = await db.execute(query, {"task_ids": list(task_titles)})
     comments = []
     
     for row in result.mappings():
         comments.append({
             "id": row["id"],
             "task_id": row["task_id"],
-            "task_title": row["task_title"],
+            "task_title": task_titles.get(str(row["task_id"])),
             "message": row["message"],
             "author_name": users_cache.get(row["author_id"], "Bilinmiyor"),
             "post_date": row["post_date"]
@@ -734,15 +850,28 @@ def _calculate_summary(
 ) -> Dict:
     """Calculate summary statistics"""
     
+    # One pass per list: deals and tasks are already loaded for the response,
+    # so re-aggregating them in SQL would only add another scan and round trip
     total_deals = len(deals)
-    open_deals = sum(1 for d in deals if not d["is_closed"])
-    won_deals = sum(1 for d in deals if d["is_won"])
-    total_value = sum(d["opportunity"] or 0 for d in deals)
-    won_value = sum(d["opportunity"] or 0 for d in deals if d["is_won"])
+    open_deals = won_deals = 0
+    total_value = won_value = 0
+    for d in deals:
+        value = d["opportunity"] or 0
+        total_value += value
+        if d["is_won"]:
+            won_deals += 1
+            won_value += value
+        if not d["is_closed"]:
+            open_deals += 1
     
     total_tasks = len(tasks)
-    completed_tasks = sum(1 for t in tasks if t["status"] == 5)
-    pending_tasks = sum(1 for t in tasks if t["status"] in [1, 2, 3])
+    completed_tasks = pending_tasks = 0
+    for t in tasks:
+        status = t["status"]
+        if status == 5:
+            completed_tasks += 1
+        elif status in (1, 2, 3):
+            pending_tasks += 1
     
     total_activities = len(activities)
     
@@ -12,6 +12,7 @@ from datetime import datetime
 import json
 
 from app.database import get_db
+from app.api.bidirectional_sync import invalidate_sync_config
 
 router = APIRouter(prefix="/api/sync-center", tags=["sync-center"])
 
@@ -152,6 +153,7 @@ async def delete_sync_config(
             "now": datetime.now()
         })
         await db.commit()
+        invalidate_sync_config(config_id)
         
         return {"status": "deleted", "config_id": config_id}
         
@@ -191,6 +193,7 @@ async def trigger_sync(
             "now": datetime.now()
         })
         await db.commit()
+        invalidate_sync_config(config_id)
         
         return {
             "status": "triggered",
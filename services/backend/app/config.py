@@ -28,6 +28,16 @@ class Settings(BaseSettings):
     # Database URL (computed from components if not provided)
     database_url: Optional[str] = Field(default=None)
     
+    # Read replica URL for read-only endpoints (primary is used if not set)
+    database_replica_url: Optional[str] = Field(default=None)
+    
+    # Connection pool (per engine)
+    db_pool_size: int = Field(default=25)
+    db_max_overflow: int = Field(default=10)
+    db_pool_timeout: int = Field(default=5)
+    db_pool_recycle: int = Field(default=3600)
+    db_statement_cache_size: int = Field(default=1024)
+    
     @property
     def get_database_url(self) -> str:
         """Get database URL, either from DATABASE_URL env or constructed from components"""
@@ -7,9 +7,10 @@ from sqlalchemy.ext.asyncio import (
     AsyncSession,
     AsyncEngine
 )
+from sqlalchemy import event
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import NullPool
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict
+import orjson
 import structlog
 
 from app.config import settings
@@ -19,13 +20,72 @@ logger = structlog.get_logger()
 # SQLAlchemy Base
 Base = declarative_base()
 
+
+def _engine_options() -> Dict[str, Any]:
+    """
+    Pool settings shared by the primary and replica engines
+    
+    Connections are kept open (no handshake per request) and capped at
+    pool_size + max_overflow; asyncpg and SQLAlchemy both cache prepared
+    statements per connection so repeated text() queries skip parse/plan.
+    """
+    return {
+        "echo": settings.log_level == "debug",
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": True,
+        "connect_args": {
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        },
+    }
+
+
 # Async Engine - use get_database_url property
-engine: AsyncEngine = create_async_engine(
-    settings.get_database_url,
-    echo=settings.log_level == "debug",
-    poolclass=NullPool,  # Let asyncpg handle pooling
-    pool_pre_ping=True,
-)
+engine: AsyncEngine = create_async_engine(settings.get_database_url, **_engine_options())
+
+
+def _jsonb_encoder(value: Any) -> bytes:
+    """Encode a JSONB bind in binary format (version byte + JSON text)"""
+    # Strings are treated as already-serialized JSON for json.dumps callers
+    if isinstance(value, str):
+        return b"\x01" + value.encode()
+    return b"\x01" + orjson.dumps(value)
+
+
+def _jsonb_decoder(value: bytes) -> Any:
+    """Decode a binary JSONB value, skipping the version byte"""
+    return orjson.loads(value[1:])
+
+
+def _register_jsonb_codec(dbapi_connection, connection_record):
+    """
+    Let asyncpg encode dicts/lists straight to JSONB with orjson
+    
+    Runs after SQLAlchemy's own codec setup, so it replaces the default
+    str-only JSONB codec on every new connection.
+    """
+    dbapi_connection.run_async(
+        lambda conn: conn.set_type_codec(
+            "jsonb",
+            encoder=_jsonb_encoder,
+            decoder=_jsonb_decoder,
+            schema="pg_catalog",
+            format="binary",
+        )
+    )
+
+
+event.listen(engine.sync_engine, "connect", _register_jsonb_codec)
+
+# Read-only engine for GET handlers - falls back to the primary when no replica is configured
+if settings.database_replica_url:
+    replica_engine: AsyncEngine = create_async_engine(settings.database_replica_url, **_engine_options())
+    event.listen(replica_engine.sync_engine, "connect", _register_jsonb_codec)
+else:
+    replica_engine = engine
 
 # Async Session Factory
 AsyncSessionLocal = async_sessionmaker(
@@ -36,6 +96,15 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Read-only Session Factory (replica)
+ReadOnlySessionLocal = async_sessionmaker(
+    replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -59,6 +128,23 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_db_ro() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for read-only endpoints, bound to the read replica
+    
+    Nothing is committed; use get_db for handlers that write.
+    """
+    async with ReadOnlySessionLocal() as session:
+        try:
+            yield session
+        except Exception as e:
+            await session.rollback()
+            logger.error("database_session_error", error=str(e))
+            raise
+        finally:
+            await session.close()
+
+
 async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
@@ -69,4 +155,6 @@ async def init_db():
 async def close_db():
     """Close database connection pool"""
     await engine.dispose()
+    if replica_engine is not engine:
+        await replica_engine.dispose()
     logger.info("database_closed")
@@ -4,7 +4,10 @@ Latest FastAPI patterns (2025)
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
+import logging
+import orjson
 import structlog
 
 from app.config import settings
@@ -13,27 +16,42 @@ from app.api import exports, webhooks, tables, data, views, sheet_sync, lookups,
 from app.security import InternalAuthMiddleware
 
 # Configure structured logging
+# The filtering bound logger drops calls below LOG_LEVEL before any processor
+# runs, so disabled levels cost a method call and nothing else
 structlog.configure(
     processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
+        structlog.contextvars.merge_contextvars,
+        structlog.processors.add_log_level,
         structlog.processors.TimeStamper(fmt="iso"),
         structlog.processors.StackInfoRenderer(),
         structlog.processors.format_exc_info,
         structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
+        structlog.processors.JSONRenderer(serializer=orjson.dumps)
     ],
-    wrapper_class=structlog.stdlib.BoundLogger,
+    wrapper_class=structlog.make_filtering_bound_logger(
+        getattr(logging, settings.log_level.upper(), logging.INFO)
+    ),
     context_class=dict,
-    logger_factory=structlog.stdlib.LoggerFactory(),
+    logger_factory=structlog.BytesLoggerFactory(),
     cache_logger_on_first_use=True,
 )
 
 logger = structlog.get_logger()
 
 
+class RequestLogContextMiddleware:
+    """Bind request method/path to structlog contextvars for every log line in the request"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            structlog.contextvars.clear_contextvars()
+            structlog.contextvars.bind_contextvars(method=scope["method"], path=scope["path"])
+        await self.app(scope, receive, send)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
@@ -45,6 +63,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("application_shutdown")
+    await bidirectional_sync.close_bitrix_client()
     await close_db()
 
 
@@ -73,10 +92,18 @@ app.add_middleware(
     max_age=600,  # Cache preflight for 10 minutes
 )
 
+# Gzip compression for large JSON bodies (advanced view data, exports)
+# Bodies under 1 KB are sent as-is; level 5 trades a little CPU for ~6-10x smaller payloads
+# Adds Vary: Accept-Encoding automatically
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Internal Auth Middleware - API güvenliği için
 # X-Internal-Auth header'ı olmayan istekleri reddeder
 app.add_middleware(InternalAuthMiddleware)
 
+# Request log context - bound once per request instead of passed at call sites
+app.add_middleware(RequestLogContextMiddleware)
+
 # Include routers
 app.include_router(exports.router, prefix="/api/v1/exports", tags=["Exports"])
 app.include_router(webhooks.router, prefix="/api/webhooks", tags=["Webhooks"])
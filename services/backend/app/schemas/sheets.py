@@ -106,6 +106,17 @@ class SyncChangesRequest(BaseModel):
     }
 
 
+class SyncToSheetBatchRequest(BaseModel):
+    """Request to sync several configs from Bitrix24 to Google Sheets"""
+    config_ids: List[int] = Field(..., alias="configIds", min_length=1)
+    access_token: str = Field(..., alias="accessToken")
+    
+    model_config = {
+        "populate_by_name": True,
+        "extra": "ignore"
+    }
+
+
 class SyncChangesResponse(BaseModel):
     """Response from syncing changes"""
     status: str
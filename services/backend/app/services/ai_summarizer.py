@@ -4,10 +4,12 @@ Generates intelligent summaries of customer interactions using AI
 Supports: OpenAI GPT-4, Claude, or local Ollama models
 """
 
+import asyncio
 import httpx
 import json
 import os
-from typing import Optional, Dict, Any, List, Union
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple, Union, Callable, Awaitable
 from datetime import datetime, timedelta
 from enum import Enum
 import structlog
@@ -16,9 +18,53 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text
 
 from app.config import settings
+from app.database import ReadOnlySessionLocal
 
 logger = structlog.get_logger()
 
+# Collected deal data: deal_id -> (expires_at, deal date_modify, data)
+# /deals/{id} followed by /generate reuses one collection; an edit to the
+# deal (new date_modify) or a Bitrix write-back invalidates the entry.
+_collected_cache: Dict[int, Tuple[datetime, Any, Dict[str, Any]]] = {}
+COLLECTED_CACHE_TTL = timedelta(seconds=30)
+COLLECTED_CACHE_MAXSIZE = 1024
+
+
+# Stage / category display names: (kind, id) -> (expires_at, name)
+# A handful of distinct IDs, looked up once per deal row otherwise
+_name_cache: Dict[Tuple[str, str], Tuple[datetime, str]] = {}
+NAME_CACHE_TTL = timedelta(minutes=5)
+
+
+def _name_cache_get(kind: str, key: str) -> Optional[str]:
+    entry = _name_cache.get((kind, key))
+    if entry and entry[0] > datetime.now():
+        return entry[1]
+    return None
+
+
+def _name_cache_set(kind: str, key: str, name: str) -> str:
+    _name_cache[(kind, key)] = (datetime.now() + NAME_CACHE_TTL, name)
+    return name
+
+
+def invalidate_collected_data(deal_id: int) -> None:
+    """Drop cached collector output for a deal"""
+    _collected_cache.pop(deal_id, None)
+
+
+def _as_int(value: Any) -> Optional[int]:
+    """Parse a VARCHAR foreign key, None if it is empty or not numeric"""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+async def _constant(value: Any) -> Any:
+    """Awaitable placeholder for a lookup that is skipped"""
+    return value
+
 
 def format_date(value: Union[datetime, str, None], fmt: str = "%Y-%m-%d") -> str:
     """Safely format a date value (datetime object or string) to string"""
@@ -51,6 +97,282 @@ class AIProvider(str, Enum):
     OLLAMA = "ollama"
 
 
+# ============================================================================
+# SQL STATEMENTS (compiled once at import)
+# ============================================================================
+
+_Q_CONTACT_TYPE_NAME = text("""
+    SELECT name FROM bitrix.lookup_values 
+    WHERE entity_type = 'CONTACT_TYPE' AND status_id = :type_id
+    LIMIT 1
+""")
+
+_Q_STAGE_NAME = text("""
+    SELECT stage_name FROM bitrix.v_deal_stages 
+    WHERE stage_id = :stage_id
+    LIMIT 1
+""")
+
+_Q_CATEGORY_NAME = text("""
+    SELECT name FROM bitrix.deal_categories 
+    WHERE bitrix_id = :category_id
+    LIMIT 1
+""")
+
+_Q_DEALS_DETAILS = text("""
+    SELECT 
+        d.id,
+        d.title,
+        d.stage_id,
+        d.category_id,
+        d.opportunity,
+        d.currency_id as currency,
+        d.date_create,
+        d.date_modify,
+        d.assigned_by_id,
+        d.contact_id,
+        d.company_id,
+        d.comments,
+        d.source_id,
+        d.source_description,
+        d.original_data as raw_data
+    FROM bitrix.deals d
+    WHERE d.id = ANY(:deal_ids)
+""")
+
+_Q_CONTACT_DETAILS = text("""
+    SELECT 
+        c.id,
+        c.bitrix_id,
+        c.name,
+        c.second_name,
+        c.last_name,
+        c.full_name,
+        c.phone,
+        c.email,
+        c.post,
+        c.type_id,
+        c.source_id,
+        c.address,
+        c.address_city,
+        c.comments,
+        c.date_create,
+        c.date_modify,
+        c.assigned_by_id
+    FROM bitrix.contacts c
+    WHERE c.bitrix_id = :contact_id_str
+""")
+
+_Q_COMPANY_DETAILS = text("""
+    SELECT 
+        c.id,
+        c.title,
+        c.industry,
+        c.phone,
+        c.email,
+        c.address,
+        c.comments
+    FROM bitrix.companies c
+    WHERE c.bitrix_id = :company_id_str
+""")
+
+_Q_TASKS = text("""
+    SELECT 
+        t.id,
+        t.bitrix_id,
+        t.title,
+        t.description,
+        t.status,
+        t.status_name,
+        t.priority,
+        t.created_date,
+        t.deadline,
+        t.closed_date,
+        t.responsible_id,
+        t.created_by,
+        t.comments_count,
+        u.full_name as responsible_name,
+        u2.full_name as created_by_name
+    FROM bitrix.tasks t
+    LEFT JOIN bitrix.users u ON t.responsible_id = u.id_text
+    LEFT JOIN bitrix.users u2 ON t.created_by = u2.id_text
+    WHERE t.original_data->'UF_CRM_TASK' ? :deal_ref
+    ORDER BY t.created_date DESC NULLS LAST
+    LIMIT :limit
+""")
+
+_Q_TASK_COMMENTS = text("""
+    SELECT 
+        tc.id,
+        tc.task_id,
+        tc.bitrix_id,
+        tc.post_message as message,
+        tc.post_message_html as message_html,
+        tc.post_date,
+        tc.author_id,
+        tc.author_name,
+        tc.author_email
+    FROM bitrix.task_comments tc
+    WHERE tc.task_id = ANY(:task_ids)
+    ORDER BY tc.post_date ASC NULLS LAST
+    LIMIT :limit
+""")
+
+_Q_USER_NAME = text("""
+    SELECT 
+        full_name
+    FROM bitrix.users
+    WHERE id = :user_id
+""")
+
+_Q_CONTACT_DEALS = text("""
+    SELECT 
+        d.id,
+        d.title,
+        d.stage_id,
+        d.category_id,
+        d.opportunity,
+        d.currency_id as currency,
+        d.date_create,
+        d.date_modify,
+        d.assigned_by_id,
+        d.comments,
+        d.source_id,
+        u.full_name as assigned_by_name
+    FROM bitrix.deals d
+    LEFT JOIN bitrix.users u ON d.assigned_by_id = u.id_text
+    WHERE d.contact_id = :contact_id
+    ORDER BY d.date_modify DESC NULLS LAST
+""")
+
+# Deals of :contact_id resolved server-side, so per-deal lookups do not
+# have to wait for get_all_contact_deals to come back first
+_CONTACT_DEAL_IDS_SQL = "ARRAY(SELECT d.id::text FROM bitrix.deals d WHERE d.contact_id = :contact_id)"
+_CONTACT_DEAL_REFS_SQL = "ARRAY(SELECT 'D_' || d.id FROM bitrix.deals d WHERE d.contact_id = :contact_id)"
+
+
+@lru_cache(maxsize=None)
+def _tasks_for_deals_query(of_contact: bool):
+    """Tasks bound to a deal list, or to every deal of a contact (get_tasks_for_deals)"""
+    deal_refs = _CONTACT_DEAL_REFS_SQL if of_contact else "CAST(:deal_refs AS text[])"
+    return text(f"""
+    SELECT 
+        t.id,
+        t.bitrix_id,
+        t.title,
+        t.description,
+        t.status,
+        t.status_name,
+        t.priority,
+        t.created_date,
+        t.deadline,
+        t.closed_date,
+        t.responsible_id,
+        t.created_by,
+        t.comments_count,
+        t.original_data->>'UF_CRM_TASK' as crm_task_link,
+        u.full_name as responsible_name,
+        u2.full_name as created_by_name
+    FROM bitrix.tasks t
+    LEFT JOIN bitrix.users u ON t.responsible_id = u.id_text
+    LEFT JOIN bitrix.users u2 ON t.created_by = u2.id_text
+    WHERE t.original_data->'UF_CRM_TASK' ?| {deal_refs}
+    ORDER BY t.created_date DESC NULLS LAST
+    LIMIT :limit
+""")
+
+
+@lru_cache(maxsize=None)
+def _task_comments_for_deals_query(of_contact: bool):
+    """Comments of the tasks _tasks_for_deals_query selects (get_task_comments_for_deals)"""
+    deal_refs = _CONTACT_DEAL_REFS_SQL if of_contact else "CAST(:deal_refs AS text[])"
+    return text(f"""
+    SELECT 
+        tc.id,
+        tc.task_id,
+        tc.bitrix_id,
+        tc.post_message as message,
+        tc.post_message_html as message_html,
+        tc.post_date,
+        tc.author_id,
+        tc.author_name,
+        tc.author_email
+    FROM bitrix.task_comments tc
+    WHERE tc.task_id IN (
+        SELECT t.id
+        FROM bitrix.tasks t
+        WHERE t.original_data->'UF_CRM_TASK' ?| {deal_refs}
+        ORDER BY t.created_date DESC NULLS LAST
+        LIMIT :task_limit
+    )
+    ORDER BY tc.post_date ASC NULLS LAST
+    LIMIT :limit
+""")
+
+
+@lru_cache(maxsize=None)
+def _activities_query(by_deal: bool, by_contact: bool):
+    """Activities for a deal and/or contact (CustomerDataCollector.get_activities)"""
+    conditions = []
+    if by_deal:
+        conditions.append("a.owner_id = :deal_id AND a.owner_type_id = '2'")
+    if by_contact:
+        conditions.append("a.owner_id = :contact_id AND a.owner_type_id = '3'")
+    where_clause = " OR ".join(conditions)
+    return text(f"""
+    SELECT 
+        a.id,
+        a.subject,
+        a.description,
+        a.type_id,
+        COALESCE(a.data->>'DIRECTION', '') as direction,
+        COALESCE(a.data->>'COMPLETED', 'N') as completed,
+        a.created,
+        COALESCE(a.data->>'START_TIME', '') as start_time,
+        COALESCE(a.data->>'END_TIME', '') as end_time,
+        a.responsible_id
+    FROM bitrix.activities a
+    WHERE {where_clause}
+    ORDER BY a.created DESC NULLS LAST
+    LIMIT :limit
+""")
+
+
+@lru_cache(maxsize=None)
+def _activities_for_deals_query(by_deals: bool, by_contact: bool, of_contact: bool = False):
+    """Activities for several deals and/or a contact (get_activities_for_deals)"""
+    conditions = []
+    if of_contact:
+        conditions.append(f"(a.owner_id = ANY({_CONTACT_DEAL_IDS_SQL}) AND a.owner_type_id = '2')")
+    elif by_deals:
+        conditions.append("(a.owner_id = ANY(:deal_ids) AND a.owner_type_id = '2')")
+    if by_contact:
+        conditions.append("(a.owner_id = :contact_id AND a.owner_type_id = '3')")
+    where_clause = " OR ".join(conditions)
+    return text(f"""
+    SELECT 
+        a.id,
+        a.bitrix_id,
+        a.subject,
+        a.description,
+        a.type_id,
+        a.owner_id,
+        a.owner_type_id,
+        COALESCE(a.data->>'DIRECTION', '') as direction,
+        COALESCE(a.data->>'COMPLETED', 'N') as completed,
+        a.created,
+        COALESCE(a.data->>'START_TIME', '') as start_time,
+        COALESCE(a.data->>'END_TIME', '') as end_time,
+        a.responsible_id,
+        u.full_name as responsible_name
+    FROM bitrix.activities a
+    LEFT JOIN bitrix.users u ON a.responsible_id = u.id_text
+    WHERE {where_clause}
+    ORDER BY a.created DESC NULLS LAST
+    LIMIT :limit
+""")
+
+
 class CustomerDataCollector:
     """
     Collects all customer-related data from PostgreSQL
@@ -65,12 +387,7 @@ class CustomerDataCollector:
         if not type_id:
             return "Belirtilmemiş"
         
-        query = text("""
-            SELECT name FROM bitrix.lookup_values 
-            WHERE entity_type = 'CONTACT_TYPE' AND status_id = :type_id
-            LIMIT 1
-        """)
-        result = await self.db.execute(query, {"type_id": type_id})
+        result = await self.db.execute(_Q_CONTACT_TYPE_NAME, {"type_id": type_id})
         row = result.fetchone()
         if row:
             return row.name
@@ -81,93 +398,57 @@ class CustomerDataCollector:
         if not stage_id:
             return "Belirtilmemiş"
         
-        query = text("""
-            SELECT stage_name FROM bitrix.v_deal_stages 
-            WHERE stage_id = :stage_id
-            LIMIT 1
-        """)
-        result = await self.db.execute(query, {"stage_id": stage_id})
+        cached = _name_cache_get("stage", stage_id)
+        if cached is not None:
+            return cached
+        
+        result = await self.db.execute(_Q_STAGE_NAME, {"stage_id": stage_id})
         row = result.fetchone()
         if row:
-            return row.stage_name
-        return stage_id  # Return ID if no name found
+            return _name_cache_set("stage", stage_id, row.stage_name)
+        return _name_cache_set("stage", stage_id, stage_id)  # Return ID if no name found
     
     async def get_category_name(self, category_id: str) -> str:
         """Get human-readable category name"""
         if not category_id:
             return "Belirtilmemiş"
         
-        query = text("""
-            SELECT name FROM bitrix.deal_categories 
-            WHERE bitrix_id = :category_id
-            LIMIT 1
-        """)
-        result = await self.db.execute(query, {"category_id": category_id})
+        cached = _name_cache_get("category", category_id)
+        if cached is not None:
+            return cached
+        
+        result = await self.db.execute(_Q_CATEGORY_NAME, {"category_id": category_id})
         row = result.fetchone()
         if row:
-            return row.name
-        return f"Kategori {category_id}"
+            return _name_cache_set("category", category_id, row.name)
+        return _name_cache_set("category", category_id, f"Kategori {category_id}")
     
     async def get_deal_details(self, deal_id: int) -> Optional[Dict[str, Any]]:
         """Get deal information with human-readable names"""
-        query = text("""
-            SELECT 
-                d.id,
-                d.title,
-                d.stage_id,
-                d.category_id,
-                d.opportunity,
-                d.currency_id as currency,
-                d.date_create,
-                d.date_modify,
-                d.assigned_by_id,
-                d.contact_id,
-                d.company_id,
-                d.comments,
-                d.source_id,
-                d.source_description,
-                d.original_data as raw_data
-            FROM bitrix.deals d
-            WHERE d.id = :deal_id
-        """)
-        result = await self.db.execute(query, {"deal_id": deal_id})
-        row = result.fetchone()
-        if row:
+        deals = await self.get_deals_details([deal_id])
+        return deals.get(deal_id)
+    
+    async def get_deals_details(self, deal_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Get several deals in one query, keyed by deal ID"""
+        if not deal_ids:
+            return {}
+        
+        result = await self.db.execute(_Q_DEALS_DETAILS, {"deal_ids": list(deal_ids)})
+        deals = {}
+        for row in result.fetchall():
             deal_data = dict(row._mapping)
             # Add human-readable names
             deal_data['stage_name'] = await self.get_stage_name(deal_data.get('stage_id'))
             deal_data['category_name'] = await self.get_category_name(deal_data.get('category_id'))
-            return deal_data
-        return None
+            deals[deal_data['id']] = deal_data
+        return deals
     
     async def get_contact_details(self, contact_id) -> Optional[Dict[str, Any]]:
         """Get contact information with human-readable type name"""
         if contact_id is None:
             return None
         contact_id_str = str(contact_id)
-        query = text("""
-            SELECT 
-                c.id,
-                c.bitrix_id,
-                c.name,
-                c.second_name,
-                c.last_name,
-                c.full_name,
-                c.phone,
-                c.email,
-                c.post,
-                c.type_id,
-                c.source_id,
-                c.address,
-                c.address_city,
-                c.comments,
-                c.date_create,
-                c.date_modify,
-                c.assigned_by_id
-            FROM bitrix.contacts c
-            WHERE c.bitrix_id = :contact_id_str
-        """)
-        result = await self.db.execute(query, {"contact_id_str": contact_id_str})
+        result = await self.db.execute(_Q_CONTACT_DETAILS, {"contact_id_str": contact_id_str})
         row = result.fetchone()
         if row:
             contact_data = dict(row._mapping)
@@ -181,19 +462,7 @@ class CustomerDataCollector:
         if company_id is None:
             return None
         company_id_str = str(company_id)
-        query = text("""
-            SELECT 
-                c.id,
-                c.title,
-                c.industry,
-                c.phone,
-                c.email,
-                c.address,
-                c.comments
-            FROM bitrix.companies c
-            WHERE c.bitrix_id = :company_id_str
-        """)
-        result = await self.db.execute(query, {"company_id_str": company_id_str})
+        result = await self.db.execute(_Q_COMPANY_DETAILS, {"company_id_str": company_id_str})
         row = result.fetchone()
         if row:
             return dict(row._mapping)
@@ -207,39 +476,16 @@ class CustomerDataCollector:
     ) -> List[Dict[str, Any]]:
         """Get activities (calls, emails, meetings) related to deal or contact"""
         
-        conditions = []
-        params = {"limit": limit}
+        if not deal_id and not contact_id:
+            return []
         
+        params = {"limit": limit}
         if deal_id:
-            conditions.append("a.owner_id = :deal_id AND a.owner_type_id = '2'")
             params["deal_id"] = str(deal_id)
-        
         if contact_id:
-            conditions.append("a.owner_id = :contact_id AND a.owner_type_id = '3'")
             params["contact_id"] = str(contact_id)
         
-        if not conditions:
-            return []
-        
-        where_clause = " OR ".join(conditions)
-        
-        query = text(f"""
-            SELECT 
-                a.id,
-                a.subject,
-                a.description,
-                a.type_id,
-                COALESCE(a.data->>'DIRECTION', '') as direction,
-                COALESCE(a.data->>'COMPLETED', 'N') as completed,
-                a.created,
-                COALESCE(a.data->>'START_TIME', '') as start_time,
-                COALESCE(a.data->>'END_TIME', '') as end_time,
-                a.responsible_id
-            FROM bitrix.activities a
-            WHERE {where_clause}
-            ORDER BY a.created DESC NULLS LAST
-            LIMIT :limit
-        """)
+        query = _activities_query(bool(deal_id), bool(contact_id))
         
         result = await self.db.execute(query, params)
         return [dict(row._mapping) for row in result.fetchall()]
@@ -252,34 +498,8 @@ class CustomerDataCollector:
         """Get tasks related to a deal with responsible user names"""
         
         # Tasks might be linked via UF_CRM_TASK field in original_data
-        query = text("""
-            SELECT 
-                t.id,
-                t.bitrix_id,
-                t.title,
-                t.description,
-                t.status,
-                t.status_name,
-                t.priority,
-                t.created_date,
-                t.deadline,
-                t.closed_date,
-                t.responsible_id,
-                t.created_by,
-                t.comments_count,
-                CONCAT(u.name, ' ', u.last_name) as responsible_name,
-                CONCAT(u2.name, ' ', u2.last_name) as created_by_name
-            FROM bitrix.tasks t
-            LEFT JOIN bitrix.users u ON t.responsible_id = u.id::varchar
-            LEFT JOIN bitrix.users u2 ON t.created_by = u2.id::varchar
-            WHERE t.original_data IS NOT NULL 
-              AND t.original_data->>'UF_CRM_TASK' LIKE :deal_pattern
-            ORDER BY t.created_date DESC NULLS LAST
-            LIMIT :limit
-        """)
-        
-        result = await self.db.execute(query, {
-            "deal_pattern": f"%D_{deal_id}%",
+        result = await self.db.execute(_Q_TASKS, {
+            "deal_ref": f"D_{deal_id}",
             "limit": limit
         })
         return [dict(row._mapping) for row in result.fetchall()]
@@ -294,24 +514,7 @@ class CustomerDataCollector:
         if not task_ids:
             return []
         
-        query = text("""
-            SELECT 
-                tc.id,
-                tc.task_id,
-                tc.bitrix_id,
-                tc.post_message as message,
-                tc.post_message_html as message_html,
-                tc.post_date,
-                tc.author_id,
-                tc.author_name,
-                tc.author_email
-            FROM bitrix.task_comments tc
-            WHERE tc.task_id = ANY(:task_ids)
-            ORDER BY tc.post_date ASC NULLS LAST
-            LIMIT :limit
-        """)
-        
-        result = await self.db.execute(query, {
+        result = await self.db.execute(_Q_TASK_COMMENTS, {
             "task_ids": task_ids,
             "limit": limit
         })
@@ -319,13 +522,7 @@ class CustomerDataCollector:
     
     async def get_user_name(self, user_id: int) -> str:
         """Get user name by ID"""
-        query = text("""
-            SELECT 
-                CONCAT(name, ' ', last_name) as full_name
-            FROM bitrix.users
-            WHERE id = :user_id
-        """)
-        result = await self.db.execute(query, {"user_id": user_id})
+        result = await self.db.execute(_Q_USER_NAME, {"user_id": user_id})
         row = result.fetchone()
         if row:
             return row.full_name or f"Kullanıcı #{user_id}"
@@ -336,27 +533,7 @@ class CustomerDataCollector:
         if not contact_id:
             return []
         
-        query = text("""
-            SELECT 
-                d.id,
-                d.title,
-                d.stage_id,
-                d.category_id,
-                d.opportunity,
-                d.currency_id as currency,
-                d.date_create,
-                d.date_modify,
-                d.assigned_by_id,
-                d.comments,
-                d.source_id,
-                CONCAT(u.name, ' ', u.last_name) as assigned_by_name
-            FROM bitrix.deals d
-            LEFT JOIN bitrix.users u ON d.assigned_by_id = u.id::varchar
-            WHERE d.contact_id = :contact_id
-            ORDER BY d.date_modify DESC NULLS LAST
-        """)
-        
-        result = await self.db.execute(query, {"contact_id": contact_id})
+        result = await self.db.execute(_Q_CONTACT_DEALS, {"contact_id": contact_id})
         deals = []
         for row in result.fetchall():
             deal_data = dict(row._mapping)
@@ -371,52 +548,26 @@ class CustomerDataCollector:
         self, 
         deal_ids: List[int],
         contact_id: Optional[str] = None,
-        limit: int = 200
+        limit: int = 200,
+        of_contact: bool = False
     ) -> List[Dict[str, Any]]:
-        """Get activities for multiple deals and/or contact"""
-        
-        conditions = []
-        params = {"limit": limit}
+        """
+        Get activities for multiple deals and/or contact
         
-        if deal_ids:
-            deal_ids_str = [str(d) for d in deal_ids]
-            conditions.append("(a.owner_id = ANY(:deal_ids) AND a.owner_type_id = '2')")
-            params["deal_ids"] = deal_ids_str
+        With of_contact, deal_ids is ignored and the deals are all deals of
+        contact_id, resolved in the same query.
+        """
+        of_contact = of_contact and bool(contact_id)
+        if not deal_ids and not contact_id:
+            return []
         
+        params = {"limit": limit}
+        if deal_ids and not of_contact:
+            params["deal_ids"] = [str(d) for d in deal_ids]
         if contact_id:
-            if conditions:
-                conditions.append(f"(a.owner_id = :contact_id AND a.owner_type_id = '3')")
-            else:
-                conditions.append("a.owner_id = :contact_id AND a.owner_type_id = '3'")
             params["contact_id"] = contact_id
         
-        if not conditions:
-            return []
-        
-        where_clause = " OR ".join(conditions)
-        
-        query = text(f"""
-            SELECT 
-                a.id,
-                a.bitrix_id,
-                a.subject,
-                a.description,
-                a.type_id,
-                a.owner_id,
-                a.owner_type_id,
-                COALESCE(a.data->>'DIRECTION', '') as direction,
-                COALESCE(a.data->>'COMPLETED', 'N') as completed,
-                a.created,
-                COALESCE(a.data->>'START_TIME', '') as start_time,
-                COALESCE(a.data->>'END_TIME', '') as end_time,
-                a.responsible_id,
-                CONCAT(u.name, ' ', u.last_name) as responsible_name
-            FROM bitrix.activities a
-            LEFT JOIN bitrix.users u ON a.responsible_id = u.id::varchar
-            WHERE {where_clause}
-            ORDER BY a.created DESC NULLS LAST
-            LIMIT :limit
-        """)
+        query = _activities_for_deals_query(bool(deal_ids), bool(contact_id), of_contact)
         
         result = await self.db.execute(query, params)
         return [dict(row._mapping) for row in result.fetchall()]
@@ -424,47 +575,64 @@ class CustomerDataCollector:
     async def get_tasks_for_deals(
         self, 
         deal_ids: List[int],
-        limit: int = 200
+        limit: int = 200,
+        contact_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Get tasks for multiple deals"""
+        """Get tasks for multiple deals, or for every deal of contact_id"""
         
+        if contact_id:
+            return await self._fetch_for_contact_deals(_tasks_for_deals_query(True), contact_id, limit=limit)
         if not deal_ids:
             return []
         
-        # Build pattern for multiple deals
-        patterns = [f"D_{d}" for d in deal_ids]
-        pattern_conditions = " OR ".join([f"t.original_data->>'UF_CRM_TASK' LIKE '%{p}%'" for p in patterns])
+        # UF_CRM_TASK holds CRM bindings like ["D_123", "C_45"]; ?| matches any
+        # element exactly and is served by the GIN index on that key
+        result = await self.db.execute(_tasks_for_deals_query(False), {
+            "deal_refs": [f"D_{d}" for d in deal_ids],
+            "limit": limit
+        })
+        return [dict(row._mapping) for row in result.fetchall()]
+    
+    async def get_task_comments_for_deals(
+        self,
+        deal_ids: List[int],
+        task_limit: int = 200,
+        limit: int = 500,
+        contact_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get comments of the tasks get_tasks_for_deals returns, in one query
         
-        query = text(f"""
-            SELECT 
-                t.id,
-                t.bitrix_id,
-                t.title,
-                t.description,
-                t.status,
-                t.status_name,
-                t.priority,
-                t.created_date,
-                t.deadline,
-                t.closed_date,
-                t.responsible_id,
-                t.created_by,
-                t.comments_count,
-                t.original_data->>'UF_CRM_TASK' as crm_task_link,
-                CONCAT(u.name, ' ', u.last_name) as responsible_name,
-                CONCAT(u2.name, ' ', u2.last_name) as created_by_name
-            FROM bitrix.tasks t
-            LEFT JOIN bitrix.users u ON t.responsible_id = u.id::varchar
-            LEFT JOIN bitrix.users u2 ON t.created_by = u2.id::varchar
-            WHERE t.original_data IS NOT NULL 
-              AND ({pattern_conditions})
-            ORDER BY t.created_date DESC NULLS LAST
-            LIMIT :limit
-        """)
+        The task set is resolved in a subquery so comments do not have to
+        wait for the task list to come back first.
+        """
+        if contact_id:
+            return await self._fetch_for_contact_deals(
+                _task_comments_for_deals_query(True), contact_id, task_limit=task_limit, limit=limit
+            )
+        if not deal_ids:
+            return []
         
-        result = await self.db.execute(query, {"limit": limit})
+        result = await self.db.execute(_task_comments_for_deals_query(False), {
+            "deal_refs": [f"D_{d}" for d in deal_ids],
+            "task_limit": task_limit,
+            "limit": limit
+        })
+        return [dict(row._mapping) for row in result.fetchall()]
+    
+    async def _fetch_for_contact_deals(self, query, contact_id: str, **params: Any) -> List[Dict[str, Any]]:
+        """Run a per-deal lookup over every deal of a contact"""
+        result = await self.db.execute(query, {"contact_id": contact_id, **params})
         return [dict(row._mapping) for row in result.fetchall()]
     
+    async def _on_own_session(
+        self,
+        fetch: Callable[["CustomerDataCollector"], Awaitable[Any]]
+    ) -> Any:
+        """Run one lookup on a dedicated session so it can overlap with others"""
+        async with ReadOnlySessionLocal() as session:
+            return await fetch(CustomerDataCollector(session))
+    
     async def collect_all_data(self, deal_id: int) -> Dict[str, Any]:
         """
         Collect all data related to a deal for AI summarization
@@ -477,48 +645,75 @@ class CustomerDataCollector:
         if not deal:
             raise ValueError(f"Deal {deal_id} not found")
         
-        # Get contact if linked
-        contact = None
-        all_contact_deals = []
-        if deal.get("contact_id"):
-            try:
-                contact = await self.get_contact_details(deal["contact_id"])
-                # Get ALL deals for this contact
-                all_contact_deals = await self.get_all_contact_deals(str(deal["contact_id"]))
-            except (ValueError, TypeError):
-                pass
+        return await self._collect_for_deal(deal)
+    
+    async def collect_many(self, deal_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Collect summarization data for several deals
         
-        # Get company if linked
-        company = None
-        if deal.get("company_id"):
-            try:
-                company = await self.get_company_details(int(deal["company_id"]))
-            except (ValueError, TypeError):
-                pass
+        Deal rows are loaded with a single ANY(:deal_ids) query; deals that
+        do not exist are left out of the result.
+        """
+        logger.info("collecting_customer_data_batch", deal_count=len(deal_ids))
         
-        # Get all deal IDs for this contact
-        all_deal_ids = [d["id"] for d in all_contact_deals] if all_contact_deals else [deal_id]
+        deals = await self.get_deals_details(deal_ids)
+        collected = {}
+        for deal_id in deal_ids:
+            if deal_id in deals and deal_id not in collected:
+                collected[deal_id] = await self._collect_for_deal(deals[deal_id])
+        return collected
+    
+    async def _collect_for_deal(self, deal: Dict[str, Any]) -> Dict[str, Any]:
+        """Collect related data for a loaded deal, reusing a fresh cached collection"""
+        deal_id = deal["id"]
+        entry = _collected_cache.get(deal_id)
+        if entry and datetime.now() < entry[0] and entry[1] == deal.get("date_modify"):
+            return entry[2]
         
-        # Get activities for ALL deals and contact
-        activities = await self.get_activities_for_deals(
-            deal_ids=all_deal_ids,
-            contact_id=str(deal["contact_id"]) if deal.get("contact_id") else None
-        )
+        data = await self._collect_related(deal)
+        
+        if len(_collected_cache) >= COLLECTED_CACHE_MAXSIZE:
+            _collected_cache.pop(next(iter(_collected_cache)))
+        _collected_cache[deal_id] = (datetime.now() + COLLECTED_CACHE_TTL, deal.get("date_modify"), data)
+        return data
+    
+    async def _collect_related(self, deal: Dict[str, Any]) -> Dict[str, Any]:
+        """Collect contact, company, activity and task data around a loaded deal"""
+        deal_id = deal["id"]
         
-        # Get tasks for ALL deals
-        tasks = await self.get_tasks_for_deals(deal_ids=all_deal_ids)
+        contact_id = deal.get("contact_id") or None
+        company_id = _as_int(deal.get("company_id"))
+        assigned_by_id = _as_int(deal.get("assigned_by_id"))
         
-        # Get ALL task comments
-        task_ids = [t["id"] for t in tasks if t.get("id")]
-        task_comments = await self.get_task_comments(task_ids) if task_ids else []
+        contact_ref = str(contact_id) if contact_id else None
         
-        # Get responsible user name for main deal
-        responsible_name = None
-        if deal.get("assigned_by_id"):
-            try:
-                responsible_name = await self.get_user_name(int(deal["assigned_by_id"]))
-            except (ValueError, TypeError):
-                pass
+        # Every lookup is independent - activities/tasks resolve the contact's
+        # deals in SQL instead of waiting for get_all_contact_deals - so all of
+        # them run at once, each on its own session (asyncpg allows one query
+        # per connection)
+        (
+            contact, all_contact_deals, company, responsible_name,
+            activities, tasks, task_comments,
+        ) = await asyncio.gather(
+            self._on_own_session(lambda c: c.get_contact_details(contact_id))
+            if contact_id else _constant(None),
+            self._on_own_session(lambda c: c.get_all_contact_deals(contact_ref))
+            if contact_id else _constant([]),
+            self._on_own_session(lambda c: c.get_company_details(company_id))
+            if company_id else _constant(None),
+            self._on_own_session(lambda c: c.get_user_name(assigned_by_id))
+            if assigned_by_id else _constant(None),
+            # Activities, tasks and task comments for ALL deals of the contact
+            self._on_own_session(lambda c: c.get_activities_for_deals(
+                deal_ids=[deal_id], contact_id=contact_ref, of_contact=True
+            )),
+            self._on_own_session(lambda c: c.get_tasks_for_deals(
+                deal_ids=[deal_id], contact_id=contact_ref
+            )),
+            self._on_own_session(lambda c: c.get_task_comments_for_deals(
+                deal_ids=[deal_id], contact_id=contact_ref
+            )),
+        )
         
         return {
             "deal": deal,
@@ -211,6 +211,59 @@ class GoogleSheetsService:
             logger.error("get_values_exception", error=str(e))
             raise
     
+    async def batch_get_values(
+        self,
+        spreadsheet_id: str,
+        ranges: List[str],
+        major_dimension: str = "ROWS"
+    ) -> List[Dict[str, Any]]:
+        """
+        Read several ranges in one request
+        
+        Args:
+            spreadsheet_id: The spreadsheet ID
+            ranges: A1 ranges (e.g., ["Sheet1!A:A", "Sheet2!A:A"])
+            major_dimension: "ROWS" or "COLUMNS"
+            
+        Returns:
+            One {"range": ..., "values": [...]} entry per requested range, in order
+        """
+        if not ranges:
+            return []
+        
+        try:
+            url = f"{self.BASE_URL}/{spreadsheet_id}/values:batchGet"
+            
+            params = {
+                "ranges": ranges,
+                "majorDimension": major_dimension,
+                "valueRenderOption": "FORMATTED_VALUE",
+                "dateTimeRenderOption": "FORMATTED_STRING"
+            }
+            
+            response = await self.client.get(
+                url,
+                headers=self.headers,
+                params=params
+            )
+            response.raise_for_status()
+            value_ranges = response.json().get("valueRanges", [])
+            
+            logger.info("values_batch_read",
+                       spreadsheet_id=spreadsheet_id,
+                       ranges=len(ranges))
+            
+            return value_ranges
+            
+        except httpx.HTTPStatusError as e:
+            logger.error("batch_get_values_error",
+                        status=e.response.status_code,
+                        error=e.response.text)
+            raise Exception(f"Failed to batch read values: {e.response.text}")
+        except Exception as e:
+            logger.error("batch_get_values_exception", error=str(e))
+            raise
+    
     async def update_values(
         self,
         spreadsheet_id: str,
@@ -266,6 +319,54 @@ class GoogleSheetsService:
             logger.error("update_values_exception", error=str(e))
             raise
     
+    async def batch_update_values(
+        self,
+        spreadsheet_id: str,
+        data: List[Dict[str, Any]],
+        value_input_option: str = "USER_ENTERED"
+    ) -> Dict[str, Any]:
+        """
+        Write several ranges in one request
+        
+        Args:
+            spreadsheet_id: The spreadsheet ID
+            data: ValueRange objects ({"range": "Sheet1!A5", "values": [[...]]})
+            value_input_option: "RAW" or "USER_ENTERED"
+            
+        Returns:
+            Batch update response
+        """
+        try:
+            url = f"{self.BASE_URL}/{spreadsheet_id}/values:batchUpdate"
+            
+            payload = {
+                "valueInputOption": value_input_option,
+                "data": data
+            }
+            
+            response = await self.client.post(
+                url,
+                json=payload,
+                headers=self.headers
+            )
+            response.raise_for_status()
+            result = response.json()
+            
+            logger.info("values_batch_updated",
+                       spreadsheet_id=spreadsheet_id,
+                       ranges=len(data))
+            
+            return result
+            
+        except httpx.HTTPStatusError as e:
+            logger.error("batch_update_values_error",
+                        status=e.response.status_code,
+                        error=e.response.text)
+            raise Exception(f"Failed to batch update values: {e.response.text}")
+        except Exception as e:
+            logger.error("batch_update_values_exception", error=str(e))
+            raise
+    
     async def batch_update(
         self,
         spreadsheet_id: str,
@@ -401,6 +502,43 @@ class GoogleSheetsService:
             logger.error("get_spreadsheet_info_exception", error=str(e))
             raise
     
+    async def get_file_version(
+        self,
+        spreadsheet_id: str
+    ) -> Optional[str]:
+        """
+        Get the Drive version of a spreadsheet
+        
+        The version increases on every change to the file, so an equal
+        version means the sheet content has not changed.
+        
+        Args:
+            spreadsheet_id: The spreadsheet ID
+            
+        Returns:
+            Version string, or None if Drive does not report one
+        """
+        try:
+            url = f"{self.DRIVE_URL}/{spreadsheet_id}"
+            
+            response = await self.client.get(
+                url,
+                headers=self.headers,
+                params={"fields": "version"}
+            )
+            response.raise_for_status()
+            
+            return response.json().get("version")
+            
+        except httpx.HTTPStatusError as e:
+            logger.error("get_file_version_error",
+                        status=e.response.status_code,
+                        error=e.response.text)
+            raise Exception(f"Failed to get file version: {e.response.text}")
+        except Exception as e:
+            logger.error("get_file_version_exception", error=str(e))
+            raise
+    
     async def format_header_row(
         self,
         spreadsheet_id: str,
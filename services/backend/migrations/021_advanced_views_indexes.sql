@@ -0,0 +1,19 @@
+-- Advanced Views: Covering indexes for list endpoints
+-- Migration: 021_advanced_views_indexes.sql
+
+-- =====================================================
+-- 1. TABLE RELATIONS - Aktif ilişki listesi
+-- =====================================================
+-- /relations ve /relations/{table_name}: WHERE is_active ORDER BY source_table, target_table
+-- Partial + covering index: tablo taraması ve sort adımı olmadan index-only scan
+CREATE INDEX IF NOT EXISTS ix_relations_active_src_tgt
+    ON bitrix.table_relations (source_table, target_table)
+    INCLUDE (id, source_column, target_column, relation_type, display_name)
+    WHERE is_active;
+
+-- =====================================================
+-- 2. ADVANCED VIEWS - View listesi sıralaması
+-- =====================================================
+-- GET /?primary_table=...: ORDER BY is_system DESC, is_default DESC, view_name
+CREATE INDEX IF NOT EXISTS ix_advanced_views_table_order
+    ON bitrix.advanced_views (primary_table, is_system DESC, is_default DESC, view_name);
@@ -0,0 +1,14 @@
+-- ============================================================================
+-- Migration: 022_ai_summaries_deal_index.sql
+-- Description: Composite index for per-deal "last summary" aggregate
+-- ============================================================================
+
+-- list_deals: SELECT deal_id, MAX(created_at) FROM ai_summaries GROUP BY deal_id
+-- (deal_id, created_at DESC) lets the aggregate run as an index-only scan
+CREATE INDEX IF NOT EXISTS idx_ai_summaries_deal_created
+    ON bitrix.ai_summaries (deal_id, created_at DESC);
+
+-- Superseded by the composite index above (deal_id is its leading column)
+DROP INDEX IF EXISTS bitrix.idx_ai_summaries_deal_id;
+
+SELECT 'Migration 022_ai_summaries_deal_index completed successfully' as status;
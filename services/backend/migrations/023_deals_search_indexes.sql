@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Migration: 023_deals_search_indexes.sql
+-- Description: Trigram search + sort indexes for AI summary deal list
+-- ============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- list_deals: lower(d.title) LIKE '%arama%'
+-- Leading wildcard btree kullanamaz; trigram GIN index ile seq scan önlenir
+CREATE INDEX IF NOT EXISTS idx_deals_title_trgm
+    ON bitrix.deals USING gin (lower(title) gin_trgm_ops);
+
+-- list_deals: ORDER BY d.date_modify DESC NULLS LAST LIMIT ...
+CREATE INDEX IF NOT EXISTS idx_deals_date_modify
+    ON bitrix.deals (date_modify DESC NULLS LAST);
+
+-- Stage filter (d.stage_id = :stage_id) is already covered by idx_deals_stage
+
+SELECT 'Migration 023_deals_search_indexes completed successfully' as status;
@@ -0,0 +1,17 @@
+-- ============================================================================
+-- Migration: 024_users_full_name.sql
+-- Description: Stored full_name column for users (replaces per-row CONCAT)
+-- ============================================================================
+
+-- AI summary queries select CONCAT(u.name, ' ', u.last_name) for every row;
+-- a stored generated column computes it once on write.
+-- (contacts.full_name already exists from 004_normalize_contacts_table.sql)
+ALTER TABLE bitrix.users
+    ADD COLUMN IF NOT EXISTS full_name TEXT
+    GENERATED ALWAYS AS (COALESCE(name, '') || ' ' || COALESCE(last_name, '')) STORED;
+
+-- Trigram index so name search can use it later
+CREATE INDEX IF NOT EXISTS idx_users_full_name_trgm
+    ON bitrix.users USING gin (lower(full_name) gin_trgm_ops);
+
+SELECT 'Migration 024_users_full_name completed successfully' as status;
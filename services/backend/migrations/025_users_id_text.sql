@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Migration: 025_users_id_text.sql
+-- Description: Text join key for users (avoids per-row casts in joins)
+-- ============================================================================
+
+-- deals.assigned_by_id, tasks.responsible_id/created_by and
+-- activities.responsible_id are VARCHAR while users.id is INT, so joins
+-- cast one side on every row (d.assigned_by_id::int / u.id::varchar).
+-- The ::int form also fails on non-numeric values. A stored text copy of
+-- the key lets both sides compare directly and use their btree indexes.
+ALTER TABLE bitrix.users
+    ADD COLUMN IF NOT EXISTS id_text TEXT GENERATED ALWAYS AS (id::text) STORED;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_id_text ON bitrix.users (id_text);
+
+-- deals.contact_id / company_id already join VARCHAR = VARCHAR against
+-- contacts.bitrix_id / companies.bitrix_id (indexed in 004-006)
+
+SELECT 'Migration 025_users_id_text completed successfully' as status;
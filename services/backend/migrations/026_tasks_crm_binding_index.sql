@@ -0,0 +1,12 @@
+-- ============================================================================
+-- Migration: 026_tasks_crm_binding_index.sql
+-- Description: GIN index on task CRM bindings (UF_CRM_TASK)
+-- ============================================================================
+
+-- AI summary collector: original_data->'UF_CRM_TASK' ?| ARRAY['D_1', 'D_2', ...]
+-- Replaces original_data->>'UF_CRM_TASK' LIKE '%D_1%' OR ... (seq scan + text
+-- extraction per row; '_' in the pattern also matched any character)
+CREATE INDEX IF NOT EXISTS idx_tasks_uf_crm_task
+    ON bitrix.tasks USING gin ((original_data->'UF_CRM_TASK'));
+
+SELECT 'Migration 026_tasks_crm_binding_index completed successfully' as status;
@@ -0,0 +1,12 @@
+-- ============================================================================
+-- Migration: 027_ai_summaries_preview.sql
+-- Description: Stored summary preview for the history list
+-- ============================================================================
+
+-- /history selected LEFT(summary, 200) per row, which detoasts and
+-- decompresses the full summary just to truncate it.
+ALTER TABLE bitrix.ai_summaries
+    ADD COLUMN IF NOT EXISTS summary_preview TEXT
+    GENERATED ALWAYS AS (LEFT(summary, 200)) STORED;
+
+SELECT 'Migration 027_ai_summaries_preview completed successfully' as status;
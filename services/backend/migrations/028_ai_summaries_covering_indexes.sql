@@ -0,0 +1,28 @@
+-- ============================================================================
+-- Migration: 028_ai_summaries_covering_indexes.sql
+-- Description: Covering indexes for the summary history list
+-- Requires: 022 (deal_id, created_at), 027 (summary_preview column)
+-- ============================================================================
+
+-- /history: ORDER BY created_at DESC LIMIT/OFFSET
+-- Every selected column is in the index -> index-only scan, no heap visit
+CREATE INDEX IF NOT EXISTS idx_ai_summaries_created_covering
+    ON bitrix.ai_summaries (created_at DESC)
+    INCLUDE (id, deal_id, deal_title, provider, model, written_to_bitrix, summary_preview);
+
+-- Superseded by the covering index above
+DROP INDEX IF EXISTS bitrix.idx_ai_summaries_created_at;
+
+-- /history?deal_id=...: WHERE deal_id = :deal_id ORDER BY created_at DESC
+-- Replaces idx_ai_summaries_deal_created (022) with a covering variant
+CREATE INDEX IF NOT EXISTS idx_ai_summaries_deal_created_covering
+    ON bitrix.ai_summaries (deal_id, created_at DESC)
+    INCLUDE (id, deal_title, provider, model, written_to_bitrix, summary_preview);
+
+DROP INDEX IF EXISTS bitrix.idx_ai_summaries_deal_created;
+
+-- Refresh the visibility map so index-only scans skip the heap
+-- (psql -f runs in autocommit mode, VACUUM cannot run inside a transaction)
+VACUUM ANALYZE bitrix.ai_summaries;
+
+SELECT 'Migration 028_ai_summaries_covering_indexes completed successfully' as status;
@@ -0,0 +1,15 @@
+-- ============================================================================
+-- Migration: 029_deals_keyset_index.sql
+-- Description: Keyset pagination index for AI summary deal list
+-- ============================================================================
+
+-- list_deals: ORDER BY d.date_modify DESC NULLS LAST, d.id DESC
+-- Keyset sayfalama: (d.date_modify, d.id) < (:cursor_date, :cursor_id)
+-- OFFSET satırlarını okuyup atmak yerine index üzerinde doğrudan sınıra gider
+CREATE INDEX IF NOT EXISTS idx_deals_date_modify_id
+    ON bitrix.deals (date_modify DESC NULLS LAST, id DESC);
+
+-- 023'teki tek kolonlu index bu index'in öneki, artık gereksiz
+DROP INDEX IF EXISTS bitrix.idx_deals_date_modify;
+
+SELECT 'Migration 029_deals_keyset_index completed successfully' as status;
@@ -0,0 +1,20 @@
+-- ============================================================================
+-- Migration: 030_sheet_sync_row_hashes.sql
+-- Description: Per-row content hashes for Google Sheets -> Bitrix24 change detection
+-- ============================================================================
+
+-- sync_from_sheet: her satırın hash'i saklanır; sadece hash'i değişen satırlar
+-- için eski değerler okunur ve yalnızca bu satırlar yeniden yazılır.
+-- (Tablo başına tek JSON snapshot'ın her senkronizasyonda baştan yazılması yerine)
+CREATE TABLE IF NOT EXISTS bitrix.sheet_sync_row_hashes (
+    config_id BIGINT NOT NULL,
+    table_name VARCHAR(100) NOT NULL,
+    row_id VARCHAR(100) NOT NULL,
+    row_hash BIGINT NOT NULL,                      -- blake2b-64 of header/value pairs
+    row_data JSONB NOT NULL,                       -- Last seen values (field-level diff)
+    updated_at TIMESTAMP DEFAULT NOW(),
+    
+    PRIMARY KEY (config_id, table_name, row_id)
+);
+
+SELECT 'Migration 030_sheet_sync_row_hashes completed successfully' as status;
@@ -0,0 +1,11 @@
+-- ============================================================================
+-- Migration: 031_sheet_sync_revision.sql
+-- Description: Last processed Drive version per sync config
+-- ============================================================================
+
+-- sync_from_sheet: Drive dosya versiyonu son temiz senkronizasyondakiyle
+-- aynıysa sheet verisi hiç okunmadan "unchanged" döner.
+ALTER TABLE bitrix.sheet_sync_configs
+    ADD COLUMN IF NOT EXISTS last_sheet_revision VARCHAR(64);
+
+SELECT 'Migration 031_sheet_sync_revision completed successfully' as status;
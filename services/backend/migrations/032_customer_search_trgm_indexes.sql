@@ -0,0 +1,29 @@
+-- ============================================================================
+-- Migration: 032_customer_search_trgm_indexes.sql
+-- Description: Trigram indexes for Customer 360 contact/company search
+-- ============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- search_customers / list_contacts / list_companies: col ILIKE '%arama%' OR ...
+-- Leading wildcard btree kullanamaz; her kolon için trigram GIN index,
+-- OR koşulları BitmapOr ile birleştirilir (seq scan yerine)
+CREATE INDEX IF NOT EXISTS idx_contacts_full_name_trgm
+    ON bitrix.contacts USING gin (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_contacts_name_trgm
+    ON bitrix.contacts USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_contacts_last_name_trgm
+    ON bitrix.contacts USING gin (last_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_contacts_phone_trgm
+    ON bitrix.contacts USING gin (phone gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_contacts_email_trgm
+    ON bitrix.contacts USING gin (email gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_companies_title_trgm
+    ON bitrix.companies USING gin (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_companies_phone_trgm
+    ON bitrix.companies USING gin (phone gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_companies_email_trgm
+    ON bitrix.companies USING gin (email gin_trgm_ops);
+
+SELECT 'Migration 032_customer_search_trgm_indexes completed successfully' as status;
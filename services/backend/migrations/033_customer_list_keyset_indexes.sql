@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Migration: 033_customer_list_keyset_indexes.sql
+-- Description: Keyset pagination indexes for Customer 360 contact/company lists
+-- ============================================================================
+
+-- list_contacts: ORDER BY full_name ASC NULLS LAST, id ASC
+-- Keyset sayfalama: (full_name, id) > (:cursor_name, :cursor_id)
+-- OFFSET satırlarını okuyup atmak yerine index üzerinde doğrudan sınıra gider
+CREATE INDEX IF NOT EXISTS idx_contacts_full_name_id
+    ON bitrix.contacts (full_name, id);
+
+-- list_companies: ORDER BY title ASC NULLS LAST, id ASC
+CREATE INDEX IF NOT EXISTS idx_companies_title_id
+    ON bitrix.companies (title, id);
+
+-- 006'daki tek kolonlu index bu index'in öneki, artık gereksiz
+DROP INDEX IF EXISTS bitrix.idx_companies_title;
+
+SELECT 'Migration 033_customer_list_keyset_indexes completed successfully' as status;
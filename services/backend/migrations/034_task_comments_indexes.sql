@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Migration: 034_task_comments_indexes.sql
+-- Description: Indexes for Customer 360 task comment lookups
+-- ============================================================================
+
+-- AI summary: tc.task_id = ANY(:task_ids) / tc.task_id IN (...)
+CREATE INDEX IF NOT EXISTS idx_task_comments_task_id
+    ON bitrix.task_comments (task_id);
+
+-- Customer 360 _get_task_comments: tc.task_id::text = ANY(:task_ids)
+-- Cast içeren koşul düz kolon index'ini kullanamaz, ifade index'i gerekli
+CREATE INDEX IF NOT EXISTS idx_task_comments_task_id_text
+    ON bitrix.task_comments ((task_id::text));
+
+-- ORDER BY tc.data->>'POST_DATE' DESC LIMIT 50
+CREATE INDEX IF NOT EXISTS idx_task_comments_post_date
+    ON bitrix.task_comments ((data->>'POST_DATE'));
+
+SELECT 'Migration 034_task_comments_indexes completed successfully' as status;
@@ -36,6 +36,11 @@ import { Input } from '@/components/ui/input'
 import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs'
 import { ScrollArea } from '@/components/ui/scroll-area'
 
+interface ListCursor {
+  cursor_name: string | null
+  cursor_id: number
+}
+
 interface CustomerSearchResult {
   id: number
   bitrix_id: string
@@ -129,20 +134,38 @@ export default function Customer360Page() {
   const [entityList, setEntityList] = useState<CustomerSearchResult[]>([])
   const [listLoading, setListLoading] = useState(false)
   const [listTotal, setListTotal] = useState(0)
+  const [listTotalIsEstimate, setListTotalIsEstimate] = useState(false)
+  const [listHasMore, setListHasMore] = useState(false)
+  const [listNextCursor, setListNextCursor] = useState<ListCursor | null>(null)
+  // Cursor each visited page was loaded with (index = page number, page 0 = null)
+  const [listPageCursors, setListPageCursors] = useState<(ListCursor | null)[]>([null])
   const [listOffset, setListOffset] = useState(0)
   const [listSearch, setListSearch] = useState('')
   const listLimit = 20
 
   // Load entity list when type is selected
-  const loadEntityList = async (entityType: 'contact' | 'company', offset: number = 0, search: string = '') => {
+  const loadEntityList = async (
+    entityType: 'contact' | 'company',
+    offset: number = 0,
+    search: string = '',
+    cursor: ListCursor | null = null
+  ) => {
     setListLoading(true)
     try {
       const searchParam = search ? `&search=${encodeURIComponent(search)}` : ''
-      const response = await fetch(apiUrl(`/api/v1/customer360/list/${entityType}s?limit=${listLimit}&offset=${offset}${searchParam}`))
+      // Keyset paging: the page after the cursor row, no OFFSET scan on the server
+      const cursorParam = cursor
+        ? `&cursor_id=${cursor.cursor_id}${cursor.cursor_name !== null ? `&cursor_name=${encodeURIComponent(cursor.cursor_name)}` : ''}`
+        : ''
+      const response = await fetch(apiUrl(`/api/v1/customer360/list/${entityType}s?limit=${listLimit}&offset=${offset}${searchParam}${cursorParam}`))
       if (response.ok) {
         const data = await response.json()
         setEntityList(data.items)
         setListTotal(data.total)
+        setListTotalIsEstimate(data.total_is_estimate)
+        setListHasMore(data.has_more)
+        setListNextCursor(data.next_cursor)
+        setListPageCursors(prev => [...prev.slice(0, offset / listLimit), cursor])
         setListOffset(offset)
       }
     } catch (error) {
@@ -366,7 +389,7 @@ export default function Customer360Page() {
                     ) : (
                       <><Building2 className="h-5 w-5" /> Şirketler</>
                     )}
-                    <Badge variant="secondary">{listTotal} kayıt</Badge>
+                    <Badge variant="secondary">{listTotalIsEstimate ? '~' : ''}{listTotal} kayıt</Badge>
                   </CardTitle>
                   <div className="relative w-64">
                     <Search className="absolute left-3 top-1/2 -translate-y-1/2 h-4 w-4 text-muted-foreground" />
@@ -428,25 +451,30 @@ export default function Customer360Page() {
                     </div>
                     
                     {/* Pagination */}
-                    {listTotal > listLimit && (
+                    {(listOffset > 0 || listHasMore) && (
                       <div className="flex items-center justify-between mt-4 pt-4 border-t">
                         <span className="text-sm text-muted-foreground">
-                          {listOffset + 1} - {Math.min(listOffset + listLimit, listTotal)} / {listTotal}
+                          {listOffset + 1} - {listOffset + entityList.length} / {listTotalIsEstimate ? '~' : ''}{listTotal}
                         </span>
                         <div className="flex gap-2">
                           <Button
                             variant="outline"
                             size="sm"
                             disabled={listOffset === 0}
-                            onClick={() => loadEntityList(selectedEntityType, Math.max(0, listOffset - listLimit), listSearch)}
+                            onClick={() => loadEntityList(
+                              selectedEntityType,
+                              Math.max(0, listOffset - listLimit),
+                              listSearch,
+                              listPageCursors[listOffset / listLimit - 1] ?? null
+                            )}
                           >
                             Önceki
                           </Button>
                           <Button
                             variant="outline"
                             size="sm"
-                            disabled={listOffset + listLimit >= listTotal}
-                            onClick={() => loadEntityList(selectedEntityType, listOffset + listLimit, listSearch)}
+                            disabled={!listHasMore}
+                            onClick={() => loadEntityList(selectedEntityType, listOffset + listLimit, listSearch, listNextCursor)}
                           >
                             Sonraki
                           </Button>